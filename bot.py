@@ -5,15 +5,31 @@ Listens in a designated channel and creates threads for conversations.
 """
 
 import asyncio
+import importlib
+import io
 import time
 import logging
 from collections import defaultdict
 
+_IMPORT_START = time.perf_counter()
+
 import discord
+from discord import app_commands
 from discord.ext import commands
 
+import guilds
 from config import Config
-from llm import chat
+from deadline import Deadline
+from profiling import LoopLagMonitor, RequestProfiler
+from tools import activity, media_requests, movies, shows
+from tools.cache import tool_cache
+from tools.http import ServiceUnavailable
+from tools.request_mirror import request_mirror
+
+# Heavy modules (llm -> anthropic, rag -> chromadb) are imported lazily when
+# LAZY_STARTUP is on, so the gateway connects before they are loaded. The
+# service clients in tools/ only need aiohttp and are imported up front for
+# the slash commands.
 
 # ── Logging ─────────────────────────────────────────────────────────
 
@@ -23,6 +39,55 @@ logging.basicConfig(
 )
 log = logging.getLogger("apollo-bot")
 
+# ── Startup timing ──────────────────────────────────────────────────
+
+# Phase name -> seconds, logged once warm-up completes.
+startup_phases: dict[str, float] = {"imports": time.perf_counter() - _IMPORT_START}
+_process_start = time.perf_counter()
+_warm_up_task: asyncio.Task | None = None
+_docs_watch_tasks: list[asyncio.Task] = []
+_evict_task: asyncio.Task | None = None
+_webhook_runner = None
+
+
+async def load_module(name: str):
+    """Import a heavy module (llm, rag) without blocking the event loop.
+
+    warm_up() may be importing it in a thread right now; an import on the loop
+    would wait on the import lock until that finishes, stalling the heartbeat.
+    """
+    return await asyncio.to_thread(importlib.import_module, name)
+
+
+async def warm_up() -> None:
+    """Load heavy modules, the embedding model, Chroma and HTTP pools, then log timings."""
+    start = time.perf_counter()
+    llm = await load_module("llm")
+    startup_phases["llm_import"] = time.perf_counter() - start
+
+    import rag
+    from tools import http
+
+    try:
+        # With several guilds, indexes open on first use instead.
+        startup_phases.update(await asyncio.to_thread(rag.warm_up, not guilds.MULTI_GUILD))
+        startup_phases.update(await llm.warm_up())
+
+        start = time.perf_counter()
+        reachable = await http.warm_up()
+        startup_phases["service_pools"] = time.perf_counter() - start
+        down = [name for name, ok in reachable.items() if not ok]
+        if down:
+            log.warning(f"⚠️  Services unreachable during warm-up: {', '.join(down)}")
+    except Exception as e:
+        log.error(f"Warm-up failed: {e}", exc_info=True)
+
+    startup_phases["ready_to_answer"] = time.perf_counter() - _process_start
+    log.info(
+        "⏱️  Startup: "
+        + ", ".join(f"{phase}={secs:.2f}s" for phase, secs in startup_phases.items())
+    )
+
 # ── Rate limiter ────────────────────────────────────────────────────
 
 
@@ -46,13 +111,142 @@ class RateLimiter:
         return True
 
 
-rate_limiter = RateLimiter(max_requests=Config.RATE_LIMIT_PER_USER)
+# One limiter per guild, created on first use with that guild's limit.
+rate_limiters: dict[int | None, RateLimiter] = {}
+
+
+def rate_limiter_for(guild: guilds.Guild) -> RateLimiter:
+    if guild.guild_id not in rate_limiters:
+        rate_limiters[guild.guild_id] = RateLimiter(max_requests=guild.rate_limit_per_user)
+    return rate_limiters[guild.guild_id]
 
 # ── Conversation history (per-thread) ──────────────────────────────
 
 # Maps thread_id -> list of {"role": ..., "content": ...}
 thread_history: dict[int, list[dict]] = {}
 
+# ── Debounce ────────────────────────────────────────────────────
+
+
+class PendingTurn:
+    """Messages from one user in one channel that will be answered together."""
+
+    def __init__(self, message: discord.Message):
+        self.messages = [message]
+        self.timer: asyncio.Task | None = None
+        self.task: asyncio.Task | None = None
+        self.thread = None
+        self.prepared = False  # rate limit checked and thread resolved
+        self.sending = False   # first reply chunk is going out; too late to merge
+
+
+class Debouncer:
+    """Merges rapid-fire messages from the same user into a single turn.
+
+    A turn starts `window` seconds after the user's last message. If another
+    message arrives while the answer is still being generated (nothing sent
+    yet), that generation is cancelled and the turn restarts with all messages.
+    """
+
+    def __init__(self, window: float, handler, cancel_in_progress: bool = True):
+        self.window = window
+        self.handler = handler
+        self.cancel_in_progress = cancel_in_progress
+        self._turns: dict[tuple[int, int], PendingTurn] = {}
+        self.merged = 0
+        self.cancelled = 0
+
+    def submit(self, message: discord.Message) -> None:
+        key = (message.channel.id, message.author.id)
+        turn = self._turns.get(key)
+        if turn is not None and self._can_merge(turn):
+            turn.messages.append(message)
+            self.merged += 1
+            if turn.task is not None:
+                turn.task.cancel()
+                turn.task = None
+                self.cancelled += 1
+            if turn.timer is not None:
+                turn.timer.cancel()
+        else:
+            turn = PendingTurn(message)
+            self._turns[key] = turn
+        turn.timer = asyncio.create_task(self._fire(key, turn))
+
+    def _can_merge(self, turn: PendingTurn) -> bool:
+        if turn.sending:
+            return False
+        if turn.task is None:
+            return True
+        return self.cancel_in_progress and turn.prepared
+
+    async def _fire(self, key: tuple[int, int], turn: PendingTurn) -> None:
+        await asyncio.sleep(self.window)
+        turn.timer = None
+        turn.task = asyncio.create_task(self._run(key, turn))
+
+    async def _run(self, key: tuple[int, int], turn: PendingTurn) -> None:
+        try:
+            await self.handler(turn)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log.error(f"Error responding to turn: {e}", exc_info=True)
+        finally:
+            # A cancelled run has already been replaced by a newer one.
+            if self._turns.get(key) is turn and turn.task is asyncio.current_task():
+                del self._turns[key]
+
+
+# ── Gateway mode ────────────────────────────────────────────────────
+
+# In DEPLOY_MODE=gateway, turns are handed to worker.py processes through the
+# broker, which also holds conversation history and rate limits.
+broker = None
+if Config.DEPLOY_MODE == "gateway":
+    from broker import SQLiteBroker
+
+    broker = SQLiteBroker()
+
+
+async def is_allowed(user_id: int, guild: guilds.Guild) -> bool:
+    if broker is not None:
+        return await asyncio.to_thread(
+            broker.is_allowed, user_id, guild.rate_limit_per_user, 60, guild.guild_id
+        )
+    return rate_limiter_for(guild).is_allowed(user_id)
+
+
+async def reply_via_workers(
+    channel_id: int, user_id: int, user_text: str, guild_id: int | None = None
+) -> str:
+    """Enqueue a turn for the workers and wait for their reply."""
+    job_id = await asyncio.to_thread(broker.enqueue, channel_id, user_id, user_text, guild_id)
+    status, result = await broker.wait_result(job_id, timeout=Config.GATEWAY_REPLY_TIMEOUT)
+    if status in ("queued", "running") and not await asyncio.to_thread(broker.abandon, job_id):
+        # It finished just as we gave up.
+        status, result = await asyncio.to_thread(broker.result, job_id)
+    if status in ("done", "failed") and result:
+        return result
+    log.warning(f"Job {job_id} for channel {channel_id} ended with status {status!r}")
+    return (
+        "Sorry, I'm taking too long to answer right now. "
+        "Please try again in a moment."
+    )
+
+# Workers can't be interrupted mid-turn, so in gateway mode follow-ups are only
+# merged while the debounce window is still open.
+debouncer = Debouncer(
+    Config.DEBOUNCE_SECONDS,
+    lambda turn: respond(turn),
+    cancel_in_progress=broker is None,
+)
+
+# ── Profiling ───────────────────────────────────────────────────────
+
+profiler = RequestProfiler()
+lag_monitor = LoopLagMonitor(threshold=Config.LOOP_LAG_THRESHOLD_MS / 1000)
+
 # ── Discord bot setup ───────────────────────────────────────────────
 
 intents = discord.Intents.default()
@@ -61,10 +255,70 @@ intents.message_content = True
 bot = commands.Bot(command_prefix="!", intents=intents)
 
 
+@bot.event
+async def setup_hook():
+    if Config.SLASH_COMMANDS:
+        synced = await bot.tree.sync()
+        log.info(f"⚡ Synced {len(synced)} slash commands")
+
+
 @bot.event
 async def on_ready():
+    global _warm_up_task, _evict_task, _webhook_runner
     log.info(f"✅ {Config.BOT_NAME} is online as {bot.user}")
-    log.info(f"   Listening in channel ID: {Config.DISCORD_CHANNEL_ID}")
+    for guild in guilds.all_guilds():
+        prefix = f"Guild {guild.guild_id}: l" if guild.guild_id else "L"
+        log.info(f"   {prefix}istening in channel ID: {guild.channel_id}")
+
+    # on_ready fires again after reconnects; only warm up once. The gateway
+    # process never loads the LLM stack, so it has nothing to warm up.
+    if _warm_up_task is None and broker is None:
+        startup_phases["gateway"] = time.perf_counter() - _process_start
+        _warm_up_task = asyncio.create_task(warm_up())
+
+    if Config.LOOP_LAG_THRESHOLD_MS > 0 and not lag_monitor.running:
+        lag_monitor.start()
+
+    # Status lookups (slash commands here, tool calls too in single mode).
+    request_mirror.start()
+
+    # Workers pick up swapped indexes through the shared pointer file, so
+    # only one process needs to watch.
+    if Config.DOCS_WATCH and not _docs_watch_tasks:
+        rag = await load_module("rag")
+
+        for guild in guilds.all_guilds():
+            _docs_watch_tasks.append(
+                asyncio.create_task(rag.watch_docs(guild.docs_dir, collection=guild.collection))
+            )
+            log.info(f"👀 Watching {guild.docs_dir} for changes every {Config.DOCS_WATCH_INTERVAL:g}s")
+
+    if guilds.MULTI_GUILD and broker is None and _evict_task is None:
+        _evict_task = asyncio.create_task(evict_idle_indexes())
+
+    # Last, so a failure here (e.g. the port is taken) can't stop the tasks above.
+    if Config.WEBHOOK_PORT and _webhook_runner is None:
+        import webhooks
+
+        try:
+            _webhook_runner = await webhooks.start()
+        except Exception as e:
+            log.error(f"❌ Webhook receiver failed to start on port {Config.WEBHOOK_PORT}: {e}")
+
+
+async def evict_idle_indexes() -> None:
+    """Close guild doc indexes nobody has asked about for a while."""
+    rag = await load_module("rag")
+
+    while True:
+        await asyncio.sleep(60)
+        try:
+            evicted = await asyncio.to_thread(rag.evict_idle_stores, Config.GUILD_INDEX_IDLE_SECONDS)
+        except Exception as e:
+            log.error(f"Closing idle doc indexes failed: {e}", exc_info=True)
+            continue
+        for name in evicted:
+            log.info(f"💤 Closed idle doc index {name}")
 
 
 @bot.event
@@ -73,6 +327,12 @@ async def on_message(message: discord.Message):
     if message.author == bot.user:
         return
 
+    # Guilds not listed in GUILDS_FILE only get prefix commands.
+    guild = guilds.for_guild(message.guild.id if message.guild else None)
+    if guild is None:
+        await bot.process_commands(message)
+        return
+
     # ── Determine if we should respond ──────────────────────────
 
     should_respond = False
@@ -82,7 +342,7 @@ async def on_message(message: discord.Message):
     if (
         not is_thread
         and hasattr(message.channel, "id")
-        and message.channel.id == Config.DISCORD_CHANNEL_ID
+        and message.channel.id == guild.channel_id
     ):
         should_respond = True
 
@@ -98,74 +358,111 @@ async def on_message(message: discord.Message):
         await bot.process_commands(message)
         return
 
-    # ── Rate limit check ────────────────────────────────────────
+    debouncer.submit(message)
 
-    if not rate_limiter.is_allowed(message.author.id):
-        await message.reply(
-            "⏳ You're sending messages too quickly. Please wait a moment.",
-            mention_author=False,
-        )
-        return
 
-    # ── Get or create thread ────────────────────────────────────
+async def respond(turn: PendingTurn):
+    """Answer a (possibly merged) turn: rate limit, thread, Claude, reply."""
+    message = turn.messages[0]
+    is_thread = isinstance(message.channel, discord.Thread)
+    guild = guilds.for_guild(message.guild.id if message.guild else None) or guilds.DEFAULT
 
-    thread = None
-    if is_thread:
-        thread = message.channel
-    elif message.channel.id == Config.DISCORD_CHANNEL_ID:
-        # Create a new thread for this conversation
-        thread_name = message.content[:80] + ("..." if len(message.content) > 80 else "")
-        try:
-            thread = await message.create_thread(
-                name=thread_name,
-                auto_archive_duration=60,  # Archive after 1 hour of inactivity
-            )
-        except discord.HTTPException:
-            # Fall back to replying in channel if thread creation fails
-            thread = None
+    if not turn.prepared:
+        # ── Rate limit check ────────────────────────────────────
 
+        if not await is_allowed(message.author.id, guild):
+            await message.reply(
+                "⏳ You're sending messages too quickly. Please wait a moment.",
+                mention_author=False,
+            )
+            return
+
+        # ── Get or create thread ────────────────────────────────
+
+        if is_thread:
+            turn.thread = message.channel
+        elif message.channel.id == guild.channel_id:
+            # Create a new thread for this conversation
+            thread_name = message.content[:80] + ("..." if len(message.content) > 80 else "")
+            try:
+                turn.thread = await message.create_thread(
+                    name=thread_name,
+                    auto_archive_duration=60,  # Archive after 1 hour of inactivity
+                )
+            except discord.HTTPException:
+                # Fall back to replying in channel if thread creation fails
+                turn.thread = None
+        turn.prepared = True
+
+    thread = turn.thread
+    channel_id = thread.id if thread else message.channel.id
+    user_text = "\n".join(
+        m.content.replace(f"<@{bot.user.id}>", "").strip() for m in turn.messages
+    ).strip()
+
+    async with profiler.track():
+        # ── Typing indicator + call Claude ──────────────────────
+
+        target = thread or message.channel
+        async with target.typing():
+            if broker is not None:
+                response_text = await reply_via_workers(
+                    channel_id, message.author.id, user_text, guild.guild_id
+                )
+            else:
+                deadline = Deadline(Config.RESPONSE_DEADLINE_SECONDS)
+                response_text = await _reply_in_process(
+                    channel_id, user_text, deadline, guild.collection
+                )
+
+        # ── Send response (split if > 2000 chars for Discord limit)
+
+        turn.sending = True
+        for chunk in _split_message(response_text):
+            if thread:
+                await thread.send(chunk)
+            else:
+                await turn.messages[-1].reply(chunk, mention_author=False)
+
+
+async def _reply_in_process(
+    channel_id: int, user_text: str, deadline: Deadline, collection: str | None = None
+) -> str:
+    """Call Claude in this process and update the in-memory thread history."""
     # ── Build conversation history ──────────────────────────────
 
-    channel_id = thread.id if thread else message.channel.id
     if channel_id not in thread_history:
         thread_history[channel_id] = []
 
     history = thread_history[channel_id]
 
-    # ── Typing indicator + call Claude ──────────────────────────
+    try:
+        llm = await load_module("llm")
 
-    target = thread or message.channel
-    async with target.typing():
-        try:
-            user_text = message.content.replace(f"<@{bot.user.id}>", "").strip()
-            response_text = await chat(
-                user_message=user_text,
-                conversation_history=history if history else None,
-            )
+        response_text = await llm.chat(
+            user_message=user_text,
+            conversation_history=history if history else None,
+            deadline=deadline,
+            collection=collection,
+        )
 
-            # Update history
-            history.append({"role": "user", "content": user_text})
-            history.append({"role": "assistant", "content": response_text})
+        # Update history
+        history.append({"role": "user", "content": user_text})
+        history.append({"role": "assistant", "content": response_text})
 
-            # Trim history to max length
-            max_h = Config.MAX_CONVERSATION_HISTORY * 2  # pairs
-            if len(history) > max_h:
-                thread_history[channel_id] = history[-max_h:]
+        # Trim history to max length
+        max_h = Config.MAX_CONVERSATION_HISTORY * 2  # pairs
+        if len(history) > max_h:
+            thread_history[channel_id] = history[-max_h:]
 
-        except Exception as e:
-            log.error(f"Error processing message: {e}", exc_info=True)
-            response_text = (
-                "Sorry, I ran into an error processing your request. "
-                "Please try again in a moment."
-            )
+    except Exception as e:
+        log.error(f"Error processing message: {e}", exc_info=True)
+        response_text = (
+            "Sorry, I ran into an error processing your request. "
+            "Please try again in a moment."
+        )
 
-    # ── Send response (split if > 2000 chars for Discord limit) ─
-
-    for chunk in _split_message(response_text):
-        if thread:
-            await thread.send(chunk)
-        else:
-            await message.reply(chunk, mention_author=False)
+    return response_text
 
 
 def _split_message(text: str, max_len: int = 1900) -> list[str]:
@@ -200,14 +497,172 @@ async def status_command(ctx: commands.Context):
 @bot.command(name="ingest")
 @commands.has_permissions(administrator=True)
 async def ingest_command(ctx: commands.Context):
-    """Re-ingest documentation (admin only)."""
-    from rag import ingest_docs
+    """Re-ingest this server's documentation (admin only)."""
+    guild = guilds.for_guild(ctx.guild.id if ctx.guild else None)
+    if guild is None:
+        return
+    rag = await load_module("rag")
 
     await ctx.send("📥 Re-ingesting documentation...")
-    count = ingest_docs()
+    # Builds a new index in a thread; answers keep using the old one until the swap.
+    count = await asyncio.to_thread(rag.ingest_docs, guild.docs_dir, None, guild.collection)
     await ctx.send(f"✅ Done! Ingested **{count}** chunks.")
 
 
+@bot.command(name="ragstats")
+@commands.has_permissions(administrator=True)
+async def ragstats_command(ctx: commands.Context):
+    """Show retrieval cache hit rates (admin only)."""
+    rag = await load_module("rag")
+
+    stats = rag.cache_stats()
+    lines = [f"📊 **Retrieval cache** (collection v{stats['collection_version']})"]
+    for name in ("embeddings", "results"):
+        s = stats[name]
+        lines.append(
+            f"• **{name}**: {s['hit_rate']:.0%} hit rate ({s['hits']} hits / {s['misses']} misses), "
+            f"{s['entries']} entries, {s['bytes'] // 1024} KiB, {s['evictions']} evictions"
+        )
+    await ctx.send("\n".join(lines))
+
+
+@bot.command(name="llmstats")
+@commands.has_permissions(administrator=True)
+async def llmstats_command(ctx: commands.Context):
+    """Show LLM usage stats (admin only)."""
+    llm = await load_module("llm")
+    from prefetch import prefetch_stats
+    from routing import TIERS, tier_stats
+    from throttle import throttle
+
+    lines = ["📊 **Model tiers**"]
+    for tier, s in tier_stats.items():
+        avg = s["latency"] / s["calls"] if s["calls"] else 0.0
+        lines.append(
+            f"• **{tier}** (`{TIERS[tier]}`): {s['calls']} calls, {avg:.2f}s avg, "
+            f"{s['input_tokens']:,} in / {s['output_tokens']:,} out tokens, "
+            f"{s['escalations']} escalations"
+        )
+
+    t = llm.tool_result_stats
+    saved = 1 - t["compact_chars"] / t["rendered_chars"] if t["rendered_chars"] else 0.0
+    lines.append(
+        f"📊 **Tool results**: {t['calls']} calls, {t['compact_chars']:,} chars sent to the model "
+        f"vs {t['rendered_chars']:,} as markdown ({saved:.0%} smaller)"
+    )
+    p = prefetch_stats
+    lines.append(
+        f"📊 **Tool prefetch**: {p['started']} started, {p['used']} used by the model, "
+        f"{p['unused']} unused"
+    )
+    a = throttle.stats
+    lines.append(
+        f"📊 **API throttle**: concurrency limit {int(throttle.limit)} ({throttle.in_flight} in flight), "
+        f"{a['throttled']} rate-limited/overloaded, {a['retries']} retries, {a['failed']} gave up, "
+        f"{a['budget_waits']} waited for budget"
+    )
+    await ctx.send("\n".join(lines))
+
+
+@bot.command(name="profile")
+@commands.has_permissions(administrator=True)
+async def profile_command(ctx: commands.Context, requests: int = 5):
+    """Sample the next N requests and upload a flamegraph file (admin only)."""
+    if profiler.armed:
+        await ctx.send("⏳ A profile is already being collected.")
+        return
+
+    async def upload(folded: str, summary: str):
+        await ctx.send(
+            f"🔥 Profile ready: {summary}. Event loop: max lag {lag_monitor.max_lag * 1000:.0f} ms, "
+            f"{lag_monitor.stalls} stalls over {Config.LOOP_LAG_THRESHOLD_MS} ms.\n"
+            "Open the file in https://www.speedscope.app or flamegraph.pl.",
+            file=discord.File(io.BytesIO(folded.encode()), filename="apollo-profile.folded"),
+        )
+
+    requests = max(1, min(requests, 100))
+    profiler.arm(requests, upload)
+    await ctx.send(f"🔬 Profiling the next **{requests}** requests...")
+
+
+# ── Slash commands: live status without the LLM ─────────────────────
+
+# These call the tools directly (no retrieval, no model round-trips) and share
+# results through tool_cache, so a burst of /queue costs one upstream call.
+
+
+async def _reply_with(interaction: discord.Interaction, fetch) -> None:
+    """Send the text produced by `fetch`, deferring only if it is slow."""
+    task = asyncio.ensure_future(fetch)
+    # Discord drops interactions not acknowledged within 3 seconds.
+    done, _ = await asyncio.wait({task}, timeout=2.0)
+    if not done:
+        await interaction.response.defer(thinking=True)
+    try:
+        text = await task
+    except ServiceUnavailable as e:
+        text = f"⚠️ {e}"
+    except Exception as e:
+        log.error(f"Slash command /{interaction.command.name} failed: {e}", exc_info=True)
+        text = "Sorry, I couldn't reach the media services. Please try again in a moment."
+
+    chunks = _split_message(text)
+    if interaction.response.is_done():
+        await interaction.followup.send(chunks[0])
+    else:
+        await interaction.response.send_message(chunks[0])
+    for chunk in chunks[1:]:
+        await interaction.followup.send(chunk)
+
+
+async def _rendered(*calls) -> str:
+    results = await asyncio.gather(*(tool_cache.call(fn, *args) for fn, *args in calls))
+    return "\n\n".join(r.render() for r in results)
+
+
+@app_commands.command(name="queue", description="Show what's downloading right now")
+async def queue_slash(interaction: discord.Interaction):
+    await _reply_with(interaction, _rendered((movies.get_queue,), (shows.get_queue,)))
+
+
+@app_commands.command(name="streaming", description="Show who's watching on Plex")
+async def streaming_slash(interaction: discord.Interaction):
+    await _reply_with(interaction, _rendered((activity.get_activity,)))
+
+
+@app_commands.command(name="recent", description="Show recently added movies and shows")
+@app_commands.describe(count="How many items to show")
+async def recent_slash(interaction: discord.Interaction, count: app_commands.Range[int, 1, 20] = 5):
+    await _reply_with(interaction, _rendered((activity.get_recently_added, count)))
+
+
+@app_commands.command(name="status", description="Check the request status of a movie or show")
+@app_commands.describe(title="Movie or show title")
+async def status_slash(interaction: discord.Interaction, title: str):
+    await _reply_with(interaction, _rendered((media_requests.get_request_by_title, title.strip())))
+
+
+@status_slash.autocomplete("title")
+async def _title_autocomplete(interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
+    """Suggest titles from the request mirror, or recent requests until it has synced."""
+    if request_mirror.ready:
+        return [app_commands.Choice(name=t[:100], value=t[:100]) for t in request_mirror.titles(current)]
+    try:
+        recent = await tool_cache.call(media_requests.get_requests, "all", 50, ttl=300)
+    except Exception:
+        return []
+    current = current.strip().lower()
+    titles = dict.fromkeys(
+        r["title"] for r in recent.records if current in r["title"].lower()
+    )
+    return [app_commands.Choice(name=t[:100], value=t[:100]) for t in list(titles)[:25]]
+
+
+if Config.SLASH_COMMANDS:
+    for _command in (queue_slash, streaming_slash, recent_slash, status_slash):
+        bot.tree.add_command(_command)
+
+
 # ── Main ────────────────────────────────────────────────────────────
 
 
@@ -215,11 +670,17 @@ def main():
     if not Config.DISCORD_BOT_TOKEN:
         log.error("❌ DISCORD_BOT_TOKEN is not set. Check your .env file.")
         return
-    if not Config.ANTHROPIC_API_KEY:
+    if not Config.ANTHROPIC_API_KEY and broker is None:
         log.error("❌ ANTHROPIC_API_KEY is not set. Check your .env file.")
         return
 
     log.info(f"🚀 Starting {Config.BOT_NAME}...")
+    if not Config.LAZY_STARTUP and broker is None:
+        # Eager mode: pay import and model-load costs before connecting.
+        import llm  # noqa: F401
+        import rag
+
+        startup_phases.update(rag.warm_up(open_store=not guilds.MULTI_GUILD))
     bot.run(Config.DISCORD_BOT_TOKEN)
 
 
@@ -0,0 +1,251 @@
+"""SQLite-backed job queue and shared state for the gateway/worker deployment.
+
+In DEPLOY_MODE=gateway, bot.py only talks to Discord: it enqueues each turn
+here and waits for the answer. One or more `python worker.py` processes claim
+jobs, run retrieval + Claude + tools, and write the reply back.
+
+Conversation history and per-user rate limits live in the same database so
+every process sees the same state. Jobs for a channel are claimed one at a
+time, so turns within a conversation are answered in order.
+
+SQLite in WAL mode is a stand-in for a real broker: it works for any number of
+processes on one host (or sharing one local volume). The class is small on
+purpose so it can be swapped for Redis/Postgres for multi-node setups.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from config import Config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    channel_id  INTEGER NOT NULL,
+    user_id     INTEGER NOT NULL,
+    guild_id    INTEGER,
+    content     TEXT NOT NULL,
+    status      TEXT NOT NULL DEFAULT 'queued',   -- queued, running, done, failed, abandoned
+    result      TEXT,
+    worker      TEXT,
+    created_at  REAL NOT NULL,
+    claimed_at  REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id);
+
+CREATE TABLE IF NOT EXISTS history (
+    seq        INTEGER PRIMARY KEY AUTOINCREMENT,
+    channel_id INTEGER NOT NULL,
+    message    TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_channel ON history (channel_id, seq);
+
+CREATE TABLE IF NOT EXISTS rate_events (
+    user_id  INTEGER NOT NULL,
+    guild_id INTEGER NOT NULL DEFAULT 0,
+    ts       REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS rate_events_user ON rate_events (user_id, ts);
+"""
+
+# Columns added after the tables were first created; CREATE TABLE IF NOT EXISTS
+# won't add them to an existing database.
+ADDED_COLUMNS = {
+    "jobs": {"guild_id": "INTEGER"},
+    "rate_events": {"guild_id": "INTEGER NOT NULL DEFAULT 0"},
+}
+
+
+class SQLiteBroker:
+    def __init__(self, path: str = Config.BROKER_DB):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(SCHEMA)
+            for table, columns in ADDED_COLUMNS.items():
+                existing = {row["name"] for row in db.execute(f"PRAGMA table_info({table})")}
+                for column, ddl in columns.items():
+                    if column not in existing:
+                        db.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+
+    @contextmanager
+    def _connect(self):
+        """Open a short-lived connection; safe to use from any thread or process."""
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        try:
+            yield db
+        finally:
+            db.close()
+
+    # ── Jobs ────────────────────────────────────────────────────────
+
+    def enqueue(self, channel_id: int, user_id: int, content: str, guild_id: int | None = None) -> int:
+        with self._connect() as db:
+            cur = db.execute(
+                "INSERT INTO jobs (channel_id, user_id, guild_id, content, created_at) VALUES (?, ?, ?, ?, ?)",
+                (channel_id, user_id, guild_id, content, time.time()),
+            )
+            return cur.lastrowid
+
+    def claim(self, worker: str, max_age: float = Config.GATEWAY_REPLY_TIMEOUT) -> dict | None:
+        """Atomically claim the oldest queued job whose channel has no job running.
+
+        Jobs queued more than `max_age` seconds ago are abandoned instead: the
+        gateway has already stopped waiting for them.
+        """
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            db.execute(
+                "UPDATE jobs SET status = 'abandoned', finished_at = ? "
+                "WHERE status = 'queued' AND created_at < ?",
+                (time.time(), time.time() - max_age),
+            )
+            row = db.execute(
+                """
+                SELECT * FROM jobs
+                WHERE status = 'queued'
+                  AND channel_id NOT IN (SELECT channel_id FROM jobs WHERE status = 'running')
+                ORDER BY id LIMIT 1
+                """
+            ).fetchone()
+            if row is None:
+                db.execute("COMMIT")
+                return None
+            db.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, claimed_at = ? WHERE id = ?",
+                (worker, time.time(), row["id"]),
+            )
+            db.execute("COMMIT")
+            return dict(row)
+
+    def complete(
+        self,
+        job_id: int,
+        result: str,
+        failed: bool = False,
+        history: list[dict] | None = None,
+        max_history: int = 0,
+    ) -> bool:
+        """Store a job's reply and append `history` to its channel, in one transaction.
+
+        Returns False (and changes nothing) if the job was abandoned meanwhile,
+        so nobody will see the reply and it must not enter the history.
+        """
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            cur = db.execute(
+                "UPDATE jobs SET status = ?, result = ?, finished_at = ? WHERE id = ? AND status = 'running'",
+                ("failed" if failed else "done", result, time.time(), job_id),
+            )
+            if cur.rowcount and history:
+                (channel_id,) = db.execute("SELECT channel_id FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                self._append_history(db, channel_id, history, max_history)
+            db.execute("COMMIT")
+            return bool(cur.rowcount)
+
+    def abandon(self, job_id: int) -> bool:
+        """Mark an unfinished job as no longer wanted. Returns False if it already finished."""
+        with self._connect() as db:
+            cur = db.execute(
+                "UPDATE jobs SET status = 'abandoned', finished_at = ? "
+                "WHERE id = ? AND status IN ('queued', 'running')",
+                (time.time(), job_id),
+            )
+            return bool(cur.rowcount)
+
+    def result(self, job_id: int) -> tuple[str, str | None]:
+        """Return (status, result) for a job."""
+        with self._connect() as db:
+            row = db.execute("SELECT status, result FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            return (row["status"], row["result"]) if row else ("missing", None)
+
+    async def wait_result(self, job_id: int, timeout: float, poll: float = 0.2) -> tuple[str, str | None]:
+        """Poll until a job is done or failed, or `timeout` seconds pass."""
+        deadline = time.monotonic() + timeout
+        while True:
+            status, result = await asyncio.to_thread(self.result, job_id)
+            if status in ("done", "failed", "missing") or time.monotonic() >= deadline:
+                return status, result
+            await asyncio.sleep(poll)
+
+    def requeue_stale(self, older_than: float) -> int:
+        """Put jobs back in the queue whose worker has held them too long (e.g. it crashed)."""
+        with self._connect() as db:
+            cur = db.execute(
+                "UPDATE jobs SET status = 'queued', worker = NULL, claimed_at = NULL "
+                "WHERE status = 'running' AND claimed_at < ?",
+                (time.time() - older_than,),
+            )
+            return cur.rowcount
+
+    def purge(self, older_than: float) -> None:
+        """Delete finished jobs and rate events older than `older_than` seconds."""
+        cutoff = time.time() - older_than
+        with self._connect() as db:
+            db.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed', 'abandoned') AND finished_at < ?", (cutoff,)
+            )
+            db.execute("DELETE FROM rate_events WHERE ts < ?", (cutoff,))
+
+    # ── Conversation history ────────────────────────────────────────
+
+    def get_history(self, channel_id: int) -> list[dict]:
+        with self._connect() as db:
+            rows = db.execute(
+                "SELECT message FROM history WHERE channel_id = ? ORDER BY seq", (channel_id,)
+            ).fetchall()
+            return [json.loads(r["message"]) for r in rows]
+
+    def append_history(self, channel_id: int, messages: list[dict], max_len: int) -> None:
+        """Append messages and keep only the newest `max_len` for the channel."""
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            self._append_history(db, channel_id, messages, max_len)
+            db.execute("COMMIT")
+
+    @staticmethod
+    def _append_history(db: sqlite3.Connection, channel_id: int, messages: list[dict], max_len: int) -> None:
+        db.executemany(
+            "INSERT INTO history (channel_id, message) VALUES (?, ?)",
+            [(channel_id, json.dumps(m)) for m in messages],
+        )
+        db.execute(
+            """
+            DELETE FROM history WHERE channel_id = ? AND seq NOT IN (
+                SELECT seq FROM history WHERE channel_id = ? ORDER BY seq DESC LIMIT ?
+            )
+            """,
+            (channel_id, channel_id, max_len),
+        )
+
+    # ── Rate limiting ───────────────────────────────────────────────
+
+    def is_allowed(
+        self, user_id: int, max_requests: int, window_seconds: int = 60, guild_id: int | None = None
+    ) -> bool:
+        """Sliding-window rate limit shared by all processes, counted per guild."""
+        now = time.time()
+        guild_id = guild_id or 0
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            db.execute(
+                "DELETE FROM rate_events WHERE user_id = ? AND guild_id = ? AND ts < ?",
+                (user_id, guild_id, now - window_seconds),
+            )
+            (count,) = db.execute(
+                "SELECT COUNT(*) FROM rate_events WHERE user_id = ? AND guild_id = ?", (user_id, guild_id)
+            ).fetchone()
+            allowed = count < max_requests
+            if allowed:
+                db.execute(
+                    "INSERT INTO rate_events (user_id, guild_id, ts) VALUES (?, ?, ?)", (user_id, guild_id, now)
+                )
+            db.execute("COMMIT")
+            return allowed
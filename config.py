@@ -6,6 +6,14 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+def _timeouts(prefix: str) -> tuple[float, float]:
+    """(connect, read) timeouts in seconds for a service, falling back to the shared defaults."""
+    return (
+        float(os.getenv(f"{prefix}_CONNECT_TIMEOUT", os.getenv("SERVICE_CONNECT_TIMEOUT", "3"))),
+        float(os.getenv(f"{prefix}_READ_TIMEOUT", os.getenv("SERVICE_READ_TIMEOUT", "10"))),
+    )
+
+
 class Config:
     # Discord
     DISCORD_BOT_TOKEN: str = os.getenv("DISCORD_BOT_TOKEN", "")
@@ -13,8 +21,25 @@ class Config:
 
     # Anthropic
     ANTHROPIC_API_KEY: str = os.getenv("ANTHROPIC_API_KEY", "")
-    CLAUDE_MODEL: str = "claude-sonnet-4-5-20250929"
+    CLAUDE_MODEL: str = os.getenv("CLAUDE_MODEL", "claude-sonnet-4-5-20250929")
+    # Model tiering: simple turns go to the fast model, complex ones escalate
+    CLAUDE_MODEL_FAST: str = os.getenv("CLAUDE_MODEL_FAST", "claude-haiku-4-5-20251001")
+    MODEL_ROUTING: bool = os.getenv("MODEL_ROUTING", "true").lower() == "true"
+    ESCALATE_AFTER_TOOL_CALLS: int = int(os.getenv("ESCALATE_AFTER_TOOL_CALLS", "2"))
     CLAUDE_MAX_TOKENS: int = 1024
+    TOOL_RESULT_MAX_ROWS: int = int(os.getenv("TOOL_RESULT_MAX_ROWS", "10"))
+    # Anthropic call limits (per process). Concurrency adapts between 1 and the
+    # max; the per-minute budgets are off when 0.
+    ANTHROPIC_MAX_CONCURRENCY: int = int(os.getenv("ANTHROPIC_MAX_CONCURRENCY", "16"))
+    ANTHROPIC_RETRIES: int = int(os.getenv("ANTHROPIC_RETRIES", "4"))
+    ANTHROPIC_RPM: int = int(os.getenv("ANTHROPIC_RPM", "0"))
+    ANTHROPIC_INPUT_TPM: int = int(os.getenv("ANTHROPIC_INPUT_TPM", "0"))
+    ANTHROPIC_OUTPUT_TPM: int = int(os.getenv("ANTHROPIC_OUTPUT_TPM", "0"))
+    # Start obvious tool calls (queue, status of "<title>") before Claude asks for them
+    TOOL_PREFETCH: bool = os.getenv("TOOL_PREFETCH", "true").lower() == "true"
+    # Time budget per Discord message, and cap on tool-use rounds per answer
+    RESPONSE_DEADLINE_SECONDS: float = float(os.getenv("RESPONSE_DEADLINE_SECONDS", "45"))
+    MAX_TOOL_TURNS: int = int(os.getenv("MAX_TOOL_TURNS", "4"))
 
     # Service URLs & Keys
     MEDIA_REQUESTS_URL: str = os.getenv("MEDIA_REQUESTS_URL", "http://localhost:5055")
@@ -29,11 +54,73 @@ class Config:
     ACTIVITY_SERVICE_URL: str = os.getenv("ACTIVITY_SERVICE_URL", "http://localhost:8181")
     ACTIVITY_SERVICE_API_KEY: str = os.getenv("ACTIVITY_SERVICE_API_KEY", "")
 
+    # Service resilience: (connect, read) timeouts, retries, circuit breaker
+    MEDIA_REQUESTS_TIMEOUTS: tuple[float, float] = _timeouts("MEDIA_REQUESTS")
+    MOVIE_SERVICE_TIMEOUTS: tuple[float, float] = _timeouts("MOVIE_SERVICE")
+    TV_SERVICE_TIMEOUTS: tuple[float, float] = _timeouts("TV_SERVICE")
+    ACTIVITY_SERVICE_TIMEOUTS: tuple[float, float] = _timeouts("ACTIVITY_SERVICE")
+    SERVICE_RETRIES: int = int(os.getenv("SERVICE_RETRIES", "2"))
+    BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+    BREAKER_RESET_SECONDS: float = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+
+    # Local mirror of the media request service (status lookups and request lists)
+    REQUEST_MIRROR: bool = os.getenv("REQUEST_MIRROR", "true").lower() == "true"
+    REQUEST_MIRROR_INTERVAL_SECONDS: float = float(os.getenv("REQUEST_MIRROR_INTERVAL_SECONDS", "60"))
+    REQUEST_MIRROR_FULL_SYNC_SECONDS: float = float(os.getenv("REQUEST_MIRROR_FULL_SYNC_SECONDS", "3600"))
+    REQUEST_MIRROR_MAX_AGE_SECONDS: float = float(os.getenv("REQUEST_MIRROR_MAX_AGE_SECONDS", "600"))
+
+    # Slash commands (/queue, /streaming, /recent, /status) call tools directly
+    SLASH_COMMANDS: bool = os.getenv("SLASH_COMMANDS", "true").lower() == "true"
+    TOOL_CACHE_TTL: float = float(os.getenv("TOOL_CACHE_TTL", "20"))
+
+    # Webhook receiver for push-based cache invalidation (0 = disabled)
+    WEBHOOK_HOST: str = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+    WEBHOOK_PORT: int = int(os.getenv("WEBHOOK_PORT", "0"))
+    WEBHOOK_SECRET: str = os.getenv("WEBHOOK_SECRET", "")
+
+    # Vector store: "chroma" (persistent HNSW) or "numpy" (in-memory exact search)
+    VECTOR_BACKEND: str = os.getenv("VECTOR_BACKEND", "chroma")
+
     # ChromaDB
     CHROMA_PERSIST_DIR: str = os.getenv("CHROMA_PERSIST_DIR", "./data/chromadb")
     CHROMA_COLLECTION: str = "apollo_docs"
 
+    # Active-index pointers for blue/green re-ingestion, and docs hot reload
+    RAG_STATE_DIR: str = os.getenv("RAG_STATE_DIR", "./data")
+    DOCS_WATCH: bool = os.getenv("DOCS_WATCH", "false").lower() == "true"
+    DOCS_WATCH_INTERVAL: float = float(os.getenv("DOCS_WATCH_INTERVAL", "5"))
+
+    # Multi-guild mode: JSON file of per-guild settings (see guilds.py); empty = one guild
+    GUILDS_FILE: str = os.getenv("GUILDS_FILE", "")
+    GUILD_INDEX_IDLE_SECONDS: float = float(os.getenv("GUILD_INDEX_IDLE_SECONDS", "900"))
+
+    # NumPy backend
+    NUMPY_STORE_DIR: str = os.getenv("NUMPY_STORE_DIR", "./data/numpy")
+    NUMPY_STORE_DTYPE: str = os.getenv("NUMPY_STORE_DTYPE", "float32")  # float32, float16 or int8
+
+    # Retrieval re-ranking: fetch RAG_OVERFETCH x n_results candidates, then MMR
+    RAG_OVERFETCH: int = int(os.getenv("RAG_OVERFETCH", "3"))
+    RAG_MMR_LAMBDA: float = float(os.getenv("RAG_MMR_LAMBDA", "0.7"))
+
+    # Retrieval cache (query embeddings + results)
+    RAG_CACHE_MAX_ENTRIES: int = int(os.getenv("RAG_CACHE_MAX_ENTRIES", "512"))
+    RAG_CACHE_MAX_BYTES: int = int(os.getenv("RAG_CACHE_MAX_BYTES", str(8 * 1024 * 1024)))
+
     # Bot behavior
     BOT_NAME: str = os.getenv("BOT_NAME", "Apollo Assistant")
     RATE_LIMIT_PER_USER: int = int(os.getenv("RATE_LIMIT_PER_USER", "10"))
     MAX_CONVERSATION_HISTORY: int = int(os.getenv("MAX_CONVERSATION_HISTORY", "10"))
+    # Messages from the same user within this many seconds are answered as one
+    DEBOUNCE_SECONDS: float = float(os.getenv("DEBOUNCE_SECONDS", "1.5"))
+    # Deployment: "single" (one process does everything) or "gateway"
+    # (bot.py only handles Discord; worker.py processes answer via the broker)
+    DEPLOY_MODE: str = os.getenv("DEPLOY_MODE", "single")
+    BROKER_DB: str = os.getenv("BROKER_DB", "./data/broker.sqlite3")
+    WORKER_CONCURRENCY: int = int(os.getenv("WORKER_CONCURRENCY", "4"))
+    WORKER_POLL_SECONDS: float = float(os.getenv("WORKER_POLL_SECONDS", "0.2"))
+    GATEWAY_REPLY_TIMEOUT: float = float(os.getenv("GATEWAY_REPLY_TIMEOUT", "120"))
+
+    # Log the blocking stack when the event loop stalls longer than this (0 = off)
+    LOOP_LAG_THRESHOLD_MS: int = int(os.getenv("LOOP_LAG_THRESHOLD_MS", "250"))
+
+    LAZY_STARTUP: bool = os.getenv("LAZY_STARTUP", "true").lower() == "true"
@@ -0,0 +1,48 @@
+"""Per-message time budget.
+
+A Deadline is created when a Discord message arrives and passed through
+retrieval, every model call and every tool call, so a slow service or a model
+that keeps asking for tools can't hold a conversation indefinitely.
+"""
+
+import asyncio
+import time
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a message's time budget runs out."""
+
+
+class Deadline:
+    def __init__(self, seconds: float, started: float | None = None):
+        """
+        Args:
+            seconds: Total budget for the message.
+            started: Wall-clock time (time.time()) the budget started, e.g. when
+                a gateway job was queued; defaults to now.
+        """
+        elapsed = time.time() - started if started is not None else 0.0
+        self.expires_at = time.monotonic() + seconds - elapsed
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    async def run(self, aw, reserve: float = 0.0):
+        """Await `aw`, cancelling it if it would leave less than `reserve` seconds.
+
+        Raises DeadlineExceeded when cancelled.
+        """
+        timeout = self.remaining() - reserve
+        if timeout <= 0:
+            if asyncio.iscoroutine(aw):
+                aw.close()
+            elif isinstance(aw, asyncio.Future):
+                aw.cancel()
+            raise DeadlineExceeded
+        try:
+            return await asyncio.wait_for(aw, timeout)
+        except asyncio.TimeoutError:
+            # Only our own timeout counts; a tool's timeout is an ordinary error.
+            if self.remaining() > reserve:
+                raise
+            raise DeadlineExceeded from None
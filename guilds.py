@@ -0,0 +1,77 @@
+"""Per-guild settings, for serving several Discord servers from one process.
+
+Without GUILDS_FILE the bot serves one guild configured by DISCORD_CHANNEL_ID,
+CHROMA_COLLECTION and RATE_LIMIT_PER_USER, as before. With it, GUILDS_FILE is
+a JSON object keyed by guild ID:
+
+    {
+      "123456789012345678": {
+        "channel_id": 111111111111111111,
+        "docs_dir": "./docs/friends",
+        "collection": "friends_docs",
+        "rate_limit_per_user": 5
+      }
+    }
+
+Omitted fields fall back to the single-guild settings. Messages from guilds
+not listed are ignored. Each guild's doc index is opened on first use and
+closed again when idle (see rag.evict_idle_stores); the embedding model is
+shared by all of them.
+"""
+
+import json
+
+from config import Config
+
+
+class Guild:
+    def __init__(
+        self,
+        guild_id: int | None,
+        channel_id: int = Config.DISCORD_CHANNEL_ID,
+        docs_dir: str = "./docs",
+        collection: str = Config.CHROMA_COLLECTION,
+        rate_limit_per_user: int = Config.RATE_LIMIT_PER_USER,
+    ):
+        self.guild_id = guild_id
+        self.channel_id = int(channel_id)
+        self.docs_dir = docs_dir
+        self.collection = collection
+        self.rate_limit_per_user = int(rate_limit_per_user)
+
+    def __repr__(self) -> str:
+        return f"Guild({self.guild_id}, channel={self.channel_id}, collection={self.collection!r})"
+
+
+def _load(path: str) -> dict[int, Guild]:
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+    guilds = {int(guild_id): Guild(int(guild_id), **settings) for guild_id, settings in raw.items()}
+
+    # Index generations are named "<collection>_<timestamp>", so "docs" and
+    # "docs_friends" would be easy to confuse; refuse them outright.
+    collections = {g.collection for g in guilds.values()}
+    for name in collections:
+        clash = sorted(other for other in collections if other.startswith(f"{name}_"))
+        if clash:
+            raise ValueError(
+                f"{path}: collection {name!r} is a prefix of {', '.join(map(repr, clash))}; "
+                "use names that don't start with another guild's collection name followed by '_'"
+            )
+    return guilds
+
+
+DEFAULT = Guild(None)
+GUILDS: dict[int, Guild] = _load(Config.GUILDS_FILE) if Config.GUILDS_FILE else {}
+MULTI_GUILD = bool(GUILDS)
+
+
+def for_guild(guild_id: int | None) -> Guild | None:
+    """Settings for a guild; None if multi-guild mode is on and it isn't configured."""
+    if not MULTI_GUILD:
+        return DEFAULT
+    return GUILDS.get(guild_id)
+
+
+def all_guilds() -> list[Guild]:
+    return list(GUILDS.values()) if MULTI_GUILD else [DEFAULT]
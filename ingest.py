@@ -2,16 +2,106 @@
 """Standalone script to ingest documentation into ChromaDB.
 
 Usage:
-    python ingest.py              # Ingest all docs
+    python ingest.py              # Ingest all docs (every guild's, with GUILDS_FILE)
     python ingest.py query "how do I request a movie"  # Test retrieval
+    python ingest.py bench        # Compare vector store backends
+    python ingest.py watch        # Re-ingest whenever docs change
 """
 
+import asyncio
+import logging
 import sys
-from rag import ingest_docs, retrieve
+import tempfile
+import time
+from pathlib import Path
+
+import guilds
+from config import Config
+from rag import chunk_markdown, embed_texts, get_store, ingest_docs, retrieve, watch_docs
+from vectorstore import NumpyStore
+
+BENCH_QUERIES = [
+    "how do I request a movie",
+    "my show is not showing up on plex",
+    "why is it buffering",
+    "what quality are movies downloaded in",
+    "how long does a request take",
+    "does anime have dual audio",
+    "can I request a whole season",
+    "what does pending approval mean",
+]
+
+
+def bench(docs_dir: str = "./docs", repeats: int = 200) -> None:
+    """Time top-k queries on Chroma vs. the NumPy backend at each dtype.
+
+    Uses the same chunks and embeddings for every store and reports latency
+    plus overlap of the top 4 with Chroma's results.
+    """
+    docs_path = Path(docs_dir)
+    documents, metadatas = [], []
+    for md_file in docs_path.glob("**/*.md"):
+        source = str(md_file.relative_to(docs_path))
+        for chunk in chunk_markdown(md_file.read_text(encoding="utf-8"), source=source):
+            documents.append(chunk["text"])
+            metadatas.append({"source": chunk["source"], "section": chunk["section"]})
+    if not documents:
+        print(f"⚠️  No chunks found in {docs_dir}")
+        return
+
+    ids = [f"bench-{i}" for i in range(len(documents))]
+    embeddings = embed_texts(documents)
+    queries = embed_texts(BENCH_QUERIES)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if get_store("chroma").count() == 0:
+            ingest_docs(docs_dir, backend="chroma")
+        stores = {"chroma": get_store("chroma")}
+        for dtype in NumpyStore.DTYPES:
+            store = NumpyStore(f"{tmp}/{dtype}", dtype=dtype)
+            store.upsert(ids, documents, metadatas, embeddings)
+            store.persist()
+            stores[f"numpy/{dtype}"] = store
+
+        baseline = [
+            [(r["source"], r["text"]) for r in stores["chroma"].query(q, 4)] for q in queries
+        ]
+        print(f"\n⏱️  {len(documents)} chunks, {len(queries)} queries x {repeats} repeats\n")
+        for name, store in stores.items():
+            timings = []
+            overlap = 0
+            for q, expected in zip(queries, baseline):
+                got = [(r["source"], r["text"]) for r in store.query(q, 4)]
+                overlap += len(set(got) & set(expected))
+                for _ in range(repeats):
+                    start = time.perf_counter()
+                    store.query(q, 4)
+                    timings.append(time.perf_counter() - start)
+            timings.sort()
+            p50 = timings[len(timings) // 2] * 1000
+            p99 = timings[int(len(timings) * 0.99)] * 1000
+            recall = overlap / (4 * len(queries))
+            print(f"  {name:<14} p50 {p50:7.3f} ms   p99 {p99:7.3f} ms   top-4 overlap {recall:.0%}")
+
+
+async def watch_all() -> None:
+    await asyncio.gather(
+        *(watch_docs(g.docs_dir, collection=g.collection) for g in guilds.all_guilds())
+    )
 
 
 def main():
-    if len(sys.argv) > 1 and sys.argv[1] == "query":
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        bench("./docs")
+    elif len(sys.argv) > 1 and sys.argv[1] == "watch":
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+        dirs = ", ".join(g.docs_dir for g in guilds.all_guilds())
+        print(f"👀 Watching {dirs} (every {Config.DOCS_WATCH_INTERVAL:g}s, Ctrl+C to stop)\n")
+        try:
+            asyncio.run(watch_all())
+        except KeyboardInterrupt:
+            pass
+    elif len(sys.argv) > 1 and sys.argv[1] == "query":
         query = " ".join(sys.argv[2:])
         if not query:
             print("Usage: python ingest.py query <your question>")
@@ -22,8 +112,10 @@ def main():
             print(f"  {i}. [{r['source']} > {r['section']}] (dist: {r['distance']:.3f})")
             print(f"     {r['text'][:200]}...\n")
     else:
-        print("📥 Ingesting documentation from ./docs/\n")
-        count = ingest_docs("./docs")
+        count = 0
+        for guild in guilds.all_guilds():
+            print(f"📥 Ingesting documentation from {guild.docs_dir}\n")
+            count += ingest_docs(guild.docs_dir, collection=guild.collection)
         if count > 0:
             print("\n✅ Ready! You can test with: python ingest.py query 'how do I request a movie'")
         else:
@@ -1,11 +1,23 @@
 """Claude API integration with tool use and RAG context injection."""
 
+import asyncio
 import json
+import logging
+import time
+
 import anthropic
 
+import routing
 from config import Config
+from deadline import Deadline, DeadlineExceeded
+from prefetch import Prefetcher
+from throttle import ModelBusy, throttle
 from rag import retrieve
 from tools import media_requests, movies, shows, activity
+from tools.http import ServiceUnavailable
+from tools.results import ToolResult
+
+log = logging.getLogger("apollo-bot.llm")
 
 
 # ── System prompt ───────────────────────────────────────────────────
@@ -26,6 +38,7 @@ Guidelines:
 - If you don't know something, say so honestly rather than guessing.
 - Never share API keys, server IPs, or other sensitive technical details with users.
 - Format responses for Discord (use **bold**, *italic*, and markdown as appropriate).
+- Tool results are compact: either "name: key=value ..." for a single item, or a "name (N rows)" line, a header row and one pipe-separated row per item. Present them to users in friendly prose or lists, never as raw tables.
 - When a user asks about a specific title, proactively check its status using the tools.
 """
 
@@ -61,6 +74,10 @@ TOOLS = [
                     "type": "integer",
                     "description": "Number of requests to return (max 20). Default: 10.",
                 },
+                "requested_by": {
+                    "type": "string",
+                    "description": "Only requests made by this user (their display name).",
+                },
             },
             "required": [],
         },
@@ -143,7 +160,9 @@ TOOLS = [
 TOOL_HANDLERS = {
     "search_media": lambda args: media_requests.search_media(args["query"]),
     "get_requests": lambda args: media_requests.get_requests(
-        status=args.get("status", "all"), count=args.get("count", 10)
+        status=args.get("status", "all"),
+        count=args.get("count", 10),
+        requested_by=args.get("requested_by"),
     ),
     "get_request_status": lambda args: media_requests.get_request_by_title(args["title"]),
     "get_movie_queue": lambda args: movies.get_queue(),
@@ -155,26 +174,127 @@ TOOL_HANDLERS = {
 }
 
 
+# Running totals of tool result size sent to Claude vs. the markdown rendering,
+# to track how much the compact encoding saves.
+tool_result_stats = {"calls": 0, "compact_chars": 0, "rendered_chars": 0}
+
+
+def _tool_content(name: str, result: ToolResult | str) -> str:
+    """Encode a tool result for Claude (compact records, capped rows)."""
+    if not isinstance(result, ToolResult):
+        return result
+    content = result.compact(max_rows=Config.TOOL_RESULT_MAX_ROWS)
+    rendered = len(result.render())
+    tool_result_stats["calls"] += 1
+    tool_result_stats["compact_chars"] += len(content)
+    tool_result_stats["rendered_chars"] += rendered
+    log.debug(f"{name}: {len(content)} chars to model ({rendered} as markdown)")
+    return content
+
+
+# ── Client ──────────────────────────────────────────────────────────
+
+_client: anthropic.AsyncAnthropic | None = None
+
+
+def get_client() -> anthropic.AsyncAnthropic:
+    """Return the shared async Anthropic client, creating it on first use."""
+    global _client
+    if _client is None:
+        # Retries are done by the throttle, which also adapts concurrency.
+        _client = anthropic.AsyncAnthropic(api_key=Config.ANTHROPIC_API_KEY, max_retries=0)
+    return _client
+
+
+async def warm_up() -> dict[str, float]:
+    """Open the Anthropic HTTP connection pool with a cheap authenticated request.
+
+    Returns per-phase timings in seconds.
+    """
+    start = time.perf_counter()
+    try:
+        await get_client().models.list(limit=1)
+    except anthropic.APIError:
+        pass
+    return {"anthropic_pool": time.perf_counter() - start}
+
+
+async def _create(tier: str, **kwargs):
+    """Call messages.create on the model for `tier`, recording latency and usage.
+
+    A fast-tier response that the routing policy rejects is redone on the large
+    tier. Returns (tier actually used, response).
+    """
+    start = time.perf_counter()
+    response = await throttle.call(get_client().messages.create, model=routing.TIERS[tier], **kwargs)
+    routing.record(tier, time.perf_counter() - start, response.usage)
+
+    if routing.should_escalate(tier, response):
+        routing.record_escalation(tier)
+        return await _create("large", **kwargs)
+    return tier, response
+
+
 # ── Main chat function ──────────────────────────────────────────────
 
-client = anthropic.Anthropic(api_key=Config.ANTHROPIC_API_KEY)
+
+# Seconds kept back from retrieval and tool calls so there is still time for
+# the model to write an answer from whatever was gathered.
+ANSWER_RESERVE_SECONDS = 8.0
+
+BUSY_REPLY = (
+    "Sorry, I'm getting a lot of questions right now and couldn't get to yours. "
+    "Please try again in a minute."
+)
+
+TIMEOUT_REPLY = (
+    "Sorry, that took longer than I'm allowed to spend on one question. "
+    "Please try again in a moment."
+)
 
 
 async def chat(
     user_message: str,
     conversation_history: list[dict] | None = None,
+    deadline: Deadline | None = None,
+    collection: str | None = None,
 ) -> str:
     """Send a message to Claude with RAG context and tool use.
 
     Args:
         user_message: The user's Discord message.
         conversation_history: Previous messages in the thread for context.
+        deadline: Time budget for the whole turn; RESPONSE_DEADLINE_SECONDS from now if None.
+        collection: Doc index to retrieve from (the guild's); the default index if None.
 
     Returns:
-        Claude's text response.
+        Claude's text response, or the best partial answer if the deadline ran out.
     """
-    # 1. Retrieve relevant documentation
-    rag_results = retrieve(user_message, n_results=4)
+    deadline = deadline or Deadline(Config.RESPONSE_DEADLINE_SECONDS)
+    # Start obvious tool calls now so they overlap retrieval and the first model call.
+    prefetcher = Prefetcher(user_message, TOOL_HANDLERS)
+    try:
+        return await _chat(user_message, conversation_history, prefetcher, deadline, collection)
+    finally:
+        prefetcher.cancel()
+
+
+async def _chat(
+    user_message: str,
+    conversation_history: list[dict] | None,
+    prefetcher: Prefetcher,
+    deadline: Deadline,
+    collection: str | None,
+) -> str:
+    # 1. Retrieve relevant documentation (skipped if it eats into the answer budget)
+    try:
+        rag_results = await deadline.run(
+            asyncio.to_thread(retrieve, user_message, n_results=4, collection=collection),
+            reserve=ANSWER_RESERVE_SECONDS,
+        )
+    except DeadlineExceeded:
+        log.warning("Retrieval ran past the deadline; answering without docs")
+        rag_results = []
     rag_context = ""
     if rag_results:
         chunks = []
@@ -202,31 +322,57 @@ async def chat(
         messages.extend(conversation_history[-Config.MAX_CONVERSATION_HISTORY :])
     messages.append({"role": "user", "content": user_message})
 
-    # 4. Call Claude (with tool use loop)
-    response = client.messages.create(
-        model=Config.CLAUDE_MODEL,
-        max_tokens=Config.CLAUDE_MAX_TOKENS,
-        system=system,
-        messages=messages,
-        tools=TOOLS,
-    )
+    # 4. Call Claude (with tool use loop), starting on the tier the router picks
+    tier = routing.initial_tier(user_message, conversation_history)
+    try:
+        tier, response = await deadline.run(_create(
+            tier,
+            max_tokens=Config.CLAUDE_MAX_TOKENS,
+            system=system,
+            messages=messages,
+            tools=TOOLS,
+        ))
+    except DeadlineExceeded:
+        log.warning("First model call ran past the deadline")
+        return TIMEOUT_REPLY
+    except ModelBusy as e:
+        log.warning(str(e))
+        return BUSY_REPLY
 
-    # 5. Handle tool use loop (Claude may call multiple tools)
+    # 5. Handle tool use loop (Claude may call multiple tools), at most
+    # MAX_TOOL_TURNS rounds and within the deadline
+    tool_calls = 0
+    tool_turns = 0
+    found: list[str] = []  # rendered tool results, for a partial answer
     while response.stop_reason == "tool_use":
+        tool_turns += 1
+        out_of_time = False
         # Collect all tool calls from this response
         tool_results = []
         assistant_content = response.content
 
         for block in response.content:
             if block.type == "tool_use":
+                tool_calls += 1
                 tool_name = block.name
                 tool_input = block.input
                 tool_id = block.id
 
                 handler = TOOL_HANDLERS.get(tool_name)
                 if handler:
+                    prefetched = prefetcher.take(tool_name, tool_input)
                     try:
-                        result = await handler(tool_input)
+                        raw = await deadline.run(
+                            prefetched or handler(tool_input), reserve=ANSWER_RESERVE_SECONDS
+                        )
+                        if isinstance(raw, ToolResult):
+                            found.append(raw.render())
+                        result = _tool_content(tool_name, raw)
+                    except DeadlineExceeded:
+                        out_of_time = True
+                        result = f"{tool_name} timed out; answer without it."
+                    except ServiceUnavailable as e:
+                        result = str(e)
                     except Exception as e:
                         result = f"Error calling {tool_name}: {str(e)}"
                 else:
@@ -242,13 +388,27 @@ async def chat(
         messages.append({"role": "assistant", "content": assistant_content})
         messages.append({"role": "user", "content": tool_results})
 
-        response = client.messages.create(
-            model=Config.CLAUDE_MODEL,
-            max_tokens=Config.CLAUDE_MAX_TOKENS,
-            system=system,
-            messages=messages,
-            tools=TOOLS,
-        )
+        # Last round: no more tools, answer from what we have.
+        final = out_of_time or tool_turns >= Config.MAX_TOOL_TURNS
+        if final:
+            log.warning(f"Ending tool loop after {tool_turns} rounds (out of time: {out_of_time})")
+        try:
+            tier, response = await deadline.run(_create(
+                routing.next_tier(tier, tool_calls),
+                max_tokens=Config.CLAUDE_MAX_TOKENS,
+                system=system,
+                messages=messages,
+                tools=TOOLS,
+                **({"tool_choice": {"type": "none"}} if final else {}),
+            ))
+        except DeadlineExceeded:
+            log.warning(f"Model call ran past the deadline after {tool_calls} tool calls")
+            return _partial_answer(found)
+        except ModelBusy as e:
+            log.warning(f"Model call failed after {tool_calls} tool calls: {e}")
+            return _partial_answer(found, busy=True)
+        if final:
+            break
 
     # 6. Extract final text response
     text_parts = []
@@ -256,4 +416,22 @@ async def chat(
         if hasattr(block, "text"):
             text_parts.append(block.text)
 
-    return "\n".join(text_parts) if text_parts else "I wasn't able to generate a response. Please try again."
+    if text_parts:
+        return "\n".join(text_parts)
+    if found:
+        return _partial_answer(found)
+    return "I wasn't able to generate a response. Please try again."
+
+
+def _partial_answer(found: list[str], busy: bool = False) -> str:
+    """What to send when Claude's final answer can't be had.
+
+    busy: the API is rate-limiting or overloaded, rather than the deadline running out.
+    """
+    if not found:
+        return BUSY_REPLY if busy else TIMEOUT_REPLY
+    if busy:
+        intro = "I'm getting a lot of questions right now and couldn't finish my answer, but here's what I found:"
+    else:
+        intro = "I couldn't finish my answer in time, but here's what I found:"
+    return intro + "\n\n" + "\n\n".join(found)
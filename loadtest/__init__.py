@@ -0,0 +1 @@
+"""Load-test harness: drives the real bot pipeline against local fakes."""
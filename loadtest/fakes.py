@@ -0,0 +1,258 @@
+"""Local stand-ins for Discord, the Anthropic Messages API and the media services.
+
+The HTTP fakes are aiohttp apps bound to 127.0.0.1; the Discord fakes are
+plain objects with just the attributes bot.on_message uses.
+"""
+
+import asyncio
+import itertools
+import random
+import time
+from contextlib import asynccontextmanager
+
+from aiohttp import web
+
+# ── Anthropic ───────────────────────────────────────────────────────
+
+
+def parse_script(script: str) -> list[list[str]]:
+    """Parse a tool-use script: turns separated by ';', parallel tools by '+'.
+
+    "get_movie_queue+get_tv_queue;get_plex_activity" means the first response
+    calls two tools, the second calls one, and the third is the final answer.
+    An empty script answers immediately from the docs.
+    """
+    return [turn.split("+") for turn in script.split(";") if turn]
+
+
+TOOL_INPUTS = {
+    "search_media": {"query": "Dune"},
+    "get_request_status": {"title": "Dune"},
+    "lookup_movie": {"title": "Dune"},
+    "lookup_series": {"title": "Severance"},
+    "get_requests": {"status": "all", "count": 5},
+    "get_recently_added": {"count": 5},
+}
+
+
+class FakeAnthropic:
+    """Messages endpoint with configurable latency and a fixed tool_use script.
+
+    With `capacity`, requests beyond that many in flight get a 429 with
+    retry-after, like an account at its rate limit.
+    """
+
+    def __init__(self, latency: float, jitter: float, script: list[list[str]], capacity: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.script = script
+        self.capacity = capacity
+        self.requests = 0
+        self.rejected = 0
+        self._in_flight = 0
+        self._ids = itertools.count()
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/v1/messages", self.messages)
+        app.router.add_get("/v1/models", self.models)
+        return app
+
+    async def models(self, request: web.Request) -> web.Response:
+        return web.json_response({"data": [], "has_more": False, "first_id": None, "last_id": None})
+
+    async def messages(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        body = await request.json()
+        if self.capacity and self._in_flight >= self.capacity:
+            self.rejected += 1
+            return web.json_response(
+                {"type": "error", "error": {"type": "rate_limit_error", "message": "Rate limited"}},
+                status=429,
+                headers={"retry-after": "1"},
+            )
+        self._in_flight += 1
+        try:
+            await asyncio.sleep(max(0.0, random.gauss(self.latency, self.jitter)))
+        finally:
+            self._in_flight -= 1
+
+        # Each completed tool round adds one assistant message to the request.
+        turn = sum(1 for m in body["messages"] if m["role"] == "assistant")
+        tools_allowed = body.get("tool_choice", {}).get("type") != "none"
+        if turn < len(self.script) and tools_allowed:
+            content = [
+                {
+                    "type": "tool_use",
+                    "id": f"toolu_{next(self._ids)}",
+                    "name": name,
+                    "input": TOOL_INPUTS.get(name, {}),
+                }
+                for name in self.script[turn]
+            ]
+            stop_reason = "tool_use"
+        else:
+            content = [{"type": "text", "text": "Here's what I found. " * 20}]
+            stop_reason = "end_turn"
+
+        return web.json_response({
+            "id": f"msg_{next(self._ids)}",
+            "type": "message",
+            "role": "assistant",
+            "model": body["model"],
+            "content": content,
+            "stop_reason": stop_reason,
+            "stop_sequence": None,
+            "usage": {"input_tokens": len(str(body)) // 4, "output_tokens": 60},
+        })
+
+
+# ── Media services ──────────────────────────────────────────────────
+
+
+def media_service_apps(latency: float) -> dict[str, web.Application]:
+    """One app per service, keyed by the Config URL attribute prefix."""
+
+    def handler(payload):
+        async def handle(request: web.Request) -> web.Response:
+            await asyncio.sleep(latency)
+            return web.json_response(payload(request) if callable(payload) else payload)
+        return handle
+
+    queue = {
+        "records": [
+            {
+                "title": f"Movie {i}",
+                "series": {"title": f"Show {i}"},
+                "episode": {"seasonNumber": 1, "episodeNumber": i + 1},
+                "status": "downloading",
+                "size": 100,
+                "sizeleft": 10 * i,
+                "timeleft": "00:10:00",
+            }
+            for i in range(5)
+        ]
+    }
+    search = {
+        "results": [
+            {
+                "id": 438631,
+                "mediaType": "movie",
+                "title": "Dune",
+                "releaseDate": "2021-10-22",
+                "mediaInfo": {"status": 5, "requests": [{"requestedBy": {"displayName": "Sam"}}]},
+            }
+        ]
+    }
+    requests = {
+        "results": [
+            {
+                "id": i + 1,
+                "type": "movie",
+                "status": 2,
+                "createdAt": f"2025-01-0{i + 1}T00:00:00.000Z",
+                "updatedAt": f"2025-01-0{i + 1}T00:00:00.000Z",
+                "media": {"tmdbId": 438631 + i, "title": f"Movie {i}"},
+                "requestedBy": {"displayName": "Sam"},
+            }
+            for i in range(5)
+        ]
+    }
+
+    def tautulli(request: web.Request) -> dict:
+        cmd = request.query.get("cmd")
+        if cmd == "get_activity":
+            data = {
+                "stream_count": 1,
+                "sessions": [{"friendly_name": "Sam", "full_title": "Dune", "state": "playing"}],
+            }
+        elif cmd == "get_recently_added":
+            data = {"recently_added": [{"full_title": "Dune", "media_type": "movie"}]}
+        else:
+            data = {}
+        return {"response": {"result": "success", "data": data}}
+
+    media_requests = web.Application()
+    media_requests.router.add_get("/api/v1/search", handler(search))
+    media_requests.router.add_get("/api/v1/request", handler(requests))
+
+    movies = web.Application()
+    movies.router.add_get("/api/v3/queue", handler(queue))
+    movies.router.add_get("/api/v3/movie/lookup", handler([{"title": "Dune", "year": 2021, "hasFile": True}]))
+
+    shows = web.Application()
+    shows.router.add_get("/api/v3/queue", handler(queue))
+    shows.router.add_get("/api/v3/series/lookup", handler([{"title": "Severance", "year": 2022}]))
+
+    activity = web.Application()
+    activity.router.add_get("/api/v2", handler(tautulli))
+
+    return {
+        "MEDIA_REQUESTS": media_requests,
+        "MOVIE_SERVICE": movies,
+        "TV_SERVICE": shows,
+        "ACTIVITY_SERVICE": activity,
+    }
+
+
+async def serve(app: web.Application, port: int) -> web.AppRunner:
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner
+
+
+# ── Discord ─────────────────────────────────────────────────────────
+
+_snowflakes = itertools.count(10**17)
+
+
+class FakeUser:
+    def __init__(self, name: str):
+        self.id = next(_snowflakes)
+        self.name = name
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class FakeChannel:
+    def __init__(self, channel_id: int | None = None):
+        self.id = channel_id or next(_snowflakes)
+        self.on_send = None
+
+    @asynccontextmanager
+    async def typing(self):
+        yield
+
+    async def send(self, content: str):
+        if self.on_send:
+            self.on_send(content)
+
+
+class FakeMessage:
+    """A user message in the bot's channel; records when the first reply is sent."""
+
+    def __init__(self, author: FakeUser, channel: FakeChannel, content: str):
+        self.id = next(_snowflakes)
+        self.author = author
+        self.channel = channel
+        self.content = content
+        self.mentions: list = []
+        self.guild = None
+        self.created = time.perf_counter()
+        self.replied = asyncio.get_running_loop().create_future()
+        self.reply_text: str | None = None
+
+    def _record_reply(self, content: str) -> None:
+        if not self.replied.done():
+            self.reply_text = content
+            self.replied.set_result(time.perf_counter() - self.created)
+
+    async def create_thread(self, name: str, auto_archive_duration: int = 60) -> FakeChannel:
+        thread = FakeChannel()
+        thread.on_send = self._record_reply
+        return thread
+
+    async def reply(self, content: str, mention_author: bool = True):
+        self._record_reply(content)
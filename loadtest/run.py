@@ -0,0 +1,178 @@
+"""Run the real bot message pipeline under increasing concurrency.
+
+Starts fake Anthropic and media-service servers on localhost, points the bot's
+config at them, then feeds bot.on_message with fake Discord messages from N
+concurrent users at each concurrency level. Reports throughput, end-to-end
+latency (message received -> first reply sent) and event-loop lag. Turns the
+bot answers with its own error, busy or timeout message count as errors.
+
+Usage:
+    python -m loadtest.run
+    python -m loadtest.run --concurrency 1,8,32 --duration 20 \\
+        --anthropic-latency 1.5 --script "get_movie_queue+get_tv_queue"
+
+Retrieval uses the real vector store, so ingest the docs first
+(python ingest.py).
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from loadtest import fakes
+
+QUESTIONS = [
+    "How do I request a movie?",
+    "What's currently downloading?",
+    "Is Dune available yet?",
+    "Why is my show buffering?",
+    "Who is watching right now?",
+]
+
+
+def is_failure(reply: str, llm_module) -> bool:
+    """Whether a reply is one of the bot's own error, busy or timeout messages."""
+    return reply.startswith((
+        llm_module.BUSY_REPLY,
+        llm_module.TIMEOUT_REPLY,
+        "Sorry, I ran into an error",
+        "Sorry, I'm taking too long",
+        "⏳ You're sending messages too quickly",
+    ))
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+class LoopLagMonitor:
+    """Measures how late a periodic sleep wakes up: a proxy for event-loop blocking."""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.samples: list[float] = []
+
+    async def run(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(time.perf_counter() - start - self.interval)
+
+
+async def run_level(bot_module, llm_module, concurrency: int, duration: float, timeout: float) -> dict:
+    channel = fakes.FakeChannel(bot_module.Config.DISCORD_CHANNEL_ID)
+    latencies: list[float] = []
+    errors = 0
+    stop_at = time.perf_counter() + duration
+
+    async def user(i: int) -> None:
+        nonlocal errors
+        author = fakes.FakeUser(f"load-user-{i}")
+        n = 0
+        while time.perf_counter() < stop_at:
+            msg = fakes.FakeMessage(author, channel, QUESTIONS[(i + n) % len(QUESTIONS)])
+            n += 1
+            try:
+                await bot_module.on_message(msg)
+                latency = await asyncio.wait_for(msg.replied, timeout)
+            except Exception:
+                errors += 1
+                continue
+            if is_failure(msg.reply_text, llm_module):
+                errors += 1
+            else:
+                latencies.append(latency)
+
+    lag = LoopLagMonitor()
+    lag_task = asyncio.create_task(lag.run())
+    start = time.perf_counter()
+    await asyncio.gather(*(user(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    lag_task.cancel()
+
+    return {
+        "concurrency": concurrency,
+        "turns": len(latencies),
+        "errors": errors,
+        "throughput": len(latencies) / elapsed,
+        "p50": percentile(latencies, 0.50),
+        "p99": percentile(latencies, 0.99),
+        "lag_p99": percentile(lag.samples, 0.99),
+        "lag_max": max(lag.samples, default=0.0),
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    anthropic_fake = fakes.FakeAnthropic(
+        args.anthropic_latency, args.anthropic_jitter, fakes.parse_script(args.script),
+        capacity=args.anthropic_capacity,
+    )
+    runners = [await fakes.serve(anthropic_fake.app(), args.base_port)]
+    os.environ["ANTHROPIC_BASE_URL"] = f"http://127.0.0.1:{args.base_port}"
+    for offset, (prefix, app) in enumerate(fakes.media_service_apps(args.service_latency).items(), 1):
+        runners.append(await fakes.serve(app, args.base_port + offset))
+        os.environ[f"{prefix}_URL"] = f"http://127.0.0.1:{args.base_port + offset}"
+
+    os.environ.update({
+        "ANTHROPIC_API_KEY": "loadtest",
+        "DISCORD_CHANNEL_ID": "1",
+        "RATE_LIMIT_PER_USER": str(10**9),
+        "DEPLOY_MODE": "single",
+        "DEBOUNCE_SECONDS": str(args.debounce),
+    })
+
+    # Config reads the environment at import time, so import the bot last.
+    import bot as bot_module
+
+    bot_module.bot._connection.user = fakes.FakeUser("apollo-bot")
+    await bot_module.warm_up()
+    import llm as llm_module
+
+    print(
+        f"\n{'conc':>5} {'turns':>6} {'err':>4} {'turns/s':>8} "
+        f"{'p50 s':>7} {'p99 s':>7} {'lag p99':>8} {'lag max':>8}"
+    )
+    for concurrency in [int(c) for c in args.concurrency.split(",")]:
+        r = await run_level(bot_module, llm_module, concurrency, args.duration, args.timeout)
+        print(
+            f"{r['concurrency']:>5} {r['turns']:>6} {r['errors']:>4} {r['throughput']:>8.2f} "
+            f"{r['p50']:>7.2f} {r['p99']:>7.2f} {r['lag_p99'] * 1000:>6.1f}ms {r['lag_max'] * 1000:>6.1f}ms"
+        )
+    print(
+        f"\nFake Anthropic served {anthropic_fake.requests} requests "
+        f"({anthropic_fake.rejected} rate-limited)."
+    )
+    from throttle import throttle
+
+    print(f"Throttle: limit {int(throttle.limit)}, {throttle.stats}")
+
+    from tools import http
+
+    await http.close_session()
+    for runner in runners:
+        await runner.cleanup()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load-test the bot pipeline against local fakes.")
+    parser.add_argument("--concurrency", default="1,4,16,64", help="Comma-separated user counts.")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per level.")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-turn reply timeout.")
+    parser.add_argument("--anthropic-latency", type=float, default=0.8)
+    parser.add_argument("--anthropic-jitter", type=float, default=0.2)
+    parser.add_argument(
+        "--anthropic-capacity", type=int, default=0, help="Concurrent requests before the fake returns 429s."
+    )
+    parser.add_argument("--service-latency", type=float, default=0.05)
+    parser.add_argument("--script", default="get_movie_queue", help="Tool-use script, see fakes.parse_script.")
+    parser.add_argument("--debounce", type=float, default=0.0, help="DEBOUNCE_SECONDS for the bot.")
+    parser.add_argument("--base-port", type=int, default=18800)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
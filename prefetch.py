@@ -0,0 +1,112 @@
+"""Speculative tool prefetch.
+
+Some questions make the first tool call obvious ("what's downloading?",
+"is Dune available yet?"). For those, chat() starts the call as soon as the
+message arrives, so it overlaps retrieval and the first model call instead of
+waiting for Claude to ask for it. If the model then requests the same tool
+with equivalent input, it gets the prefetched result; anything it does not
+ask for is cancelled when the turn ends.
+"""
+
+import asyncio
+import json
+import logging
+import re
+
+from config import Config
+
+log = logging.getLogger("apollo-bot.prefetch")
+
+# Handler defaults, so {"count": 5} and {} count as the same call.
+_DEFAULTS = {
+    "get_requests": {"status": "all", "count": 10},
+    "get_recently_added": {"count": 5},
+}
+
+_QUEUE = re.compile(r"\b(queue|downloading|download(?:s|ing)? progress|currently (?:getting|grabbing))\b", re.I)
+_MOVIE = re.compile(r"\b(movies?|films?)\b", re.I)
+_TV = re.compile(r"\b(shows?|tv|series|episodes?|seasons?)\b", re.I)
+_STREAMING = re.compile(r"\b(streaming|who(?:'s| is) watching|watching right now|playing right now)\b", re.I)
+_RECENT = re.compile(r"\b(recently added|new on plex|what(?:'s| is) new|latest additions)\b", re.I)
+
+# Where a title usually appears in a status question.
+_TITLE_PATTERNS = [
+    re.compile(r"[\"“]([^\"”]{2,80})[\"”]"),
+    re.compile(r"\bstatus of (?:my request for )?(.{2,80}?)\s*[?.!]*$", re.I),
+    re.compile(
+        r"\b(?:is|has|did|are|have)\s+(.{2,60}?)\s+"
+        r"(?:available|out|ready|downloaded|done|finished|been added|on plex)\b",
+        re.I,
+    ),
+]
+_VAGUE = re.compile(r"^(it|that|this|they|those|these|my (?:request|movie|show)|the (?:movie|show|new one))$", re.I)
+
+
+def predict(user_message: str) -> list[tuple[str, dict]]:
+    """Tool calls the model is likely to make first for this message."""
+    calls = []
+    if _QUEUE.search(user_message):
+        movie, tv = _MOVIE.search(user_message), _TV.search(user_message)
+        if movie or not tv:
+            calls.append(("get_movie_queue", {}))
+        if tv or not movie:
+            calls.append(("get_tv_queue", {}))
+    if _STREAMING.search(user_message):
+        calls.append(("get_plex_activity", {}))
+    if _RECENT.search(user_message):
+        calls.append(("get_recently_added", {}))
+
+    for pattern in _TITLE_PATTERNS:
+        match = pattern.search(user_message)
+        if match:
+            title = match.group(1).strip(" ?.!'\"")
+            if title and not _VAGUE.match(title):
+                calls.append(("get_request_status", {"title": title}))
+            break
+    return calls
+
+
+def _key(name: str, tool_input: dict) -> tuple[str, str]:
+    args = {**_DEFAULTS.get(name, {}), **tool_input}
+    args = {k: v.strip().casefold() if isinstance(v, str) else v for k, v in args.items()}
+    return name, json.dumps(args, sort_keys=True)
+
+
+prefetch_stats = {"started": 0, "used": 0, "unused": 0}
+
+
+class Prefetcher:
+    """Speculative tool calls for one turn."""
+
+    def __init__(self, user_message: str, handlers: dict):
+        self._tasks: dict[tuple[str, str], asyncio.Task] = {}
+        if not Config.TOOL_PREFETCH:
+            return
+        for name, tool_input in predict(user_message):
+            handler = handlers.get(name)
+            key = _key(name, tool_input)
+            if handler is None or key in self._tasks:
+                continue
+            self._tasks[key] = asyncio.ensure_future(handler(tool_input))
+            prefetch_stats["started"] += 1
+        if self._tasks:
+            log.debug(f"Prefetching {[name for name, _ in self._tasks]}")
+
+    def take(self, name: str, tool_input: dict) -> asyncio.Task | None:
+        """The prefetched call matching this tool_use, if there is one."""
+        task = self._tasks.pop(_key(name, tool_input), None)
+        if task is not None:
+            prefetch_stats["used"] += 1
+        return task
+
+    def cancel(self) -> None:
+        """Cancel prefetches the model never asked for."""
+        for task in self._tasks.values():
+            if task.done():
+                # Retrieve the outcome so a failed guess is not logged as unhandled.
+                if not task.cancelled():
+                    task.exception()
+            else:
+                task.cancel()
+            prefetch_stats["unused"] += 1
+        self._tasks.clear()
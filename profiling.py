@@ -0,0 +1,180 @@
+"""On-demand request profiling and event-loop lag monitoring.
+
+- StackSampler: a background thread that samples every thread's Python stack
+  at a fixed interval and aggregates them as folded stacks (the input format
+  of flamegraph.pl and speedscope.app). Cost is one sys._current_frames() call
+  per interval, so it is cheap enough to run against live traffic.
+- RequestProfiler: arms a sampler for the next N requests (the !profile
+  command) and hands the result to a callback when they finish.
+- LoopLagMonitor: a watchdog thread that notices when the event loop has not
+  run a heartbeat for longer than a threshold, and logs the loop thread's
+  stack at that moment, i.e. the code that is blocking it.
+"""
+
+import asyncio
+import io
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from contextlib import asynccontextmanager
+
+log = logging.getLogger("apollo-bot.profiling")
+
+# Our own monitoring threads; never interesting in a profile.
+_IGNORED_THREADS = {"stack-sampler", "loop-lag-monitor"}
+
+
+def _folded(frame) -> str:
+    """Render a frame's stack root-first as 'file:func;file:func;...'."""
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(parts))
+
+
+class StackSampler:
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        names: dict[int, str] = {}
+        while not self._stop.wait(self.interval):
+            if len(names) != threading.active_count():
+                names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                name = names.get(ident, str(ident))
+                if ident == me or name in _IGNORED_THREADS:
+                    continue
+                self.stacks[f"{name};{_folded(frame)}"] += 1
+            self.samples += 1
+
+    def folded(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+
+class RequestProfiler:
+    """Samples stacks while the next N tracked requests run."""
+
+    def __init__(self):
+        self._remaining = 0
+        self._active = 0
+        self._completed = 0
+        self._started_at = 0.0
+        self._sampler: StackSampler | None = None
+        self._on_done = None
+
+    @property
+    def armed(self) -> bool:
+        return self._remaining > 0 or self._sampler is not None
+
+    def arm(self, requests: int, on_done) -> None:
+        """Profile the next `requests` requests, then await on_done(folded, summary)."""
+        self._remaining = requests
+        self._completed = 0
+        self._on_done = on_done
+
+    @asynccontextmanager
+    async def track(self):
+        """Wrap one request; a no-op unless the profiler is armed."""
+        if self._remaining <= 0:
+            yield
+            return
+
+        self._remaining -= 1
+        if self._sampler is None:
+            self._sampler = StackSampler()
+            self._started_at = time.perf_counter()
+            self._sampler.start()
+        self._active += 1
+        try:
+            yield
+        finally:
+            self._active -= 1
+            self._completed += 1
+            if self._remaining <= 0 and self._active == 0:
+                await self._finish()
+
+    async def _finish(self) -> None:
+        sampler, self._sampler = self._sampler, None
+        await asyncio.to_thread(sampler.stop)
+        summary = (
+            f"{self._completed} requests, {time.perf_counter() - self._started_at:.1f}s, "
+            f"{sampler.samples} samples"
+        )
+        on_done, self._on_done = self._on_done, None
+        if on_done is not None:
+            await on_done(sampler.folded(), summary)
+
+
+class LoopLagMonitor:
+    """Logs the event-loop thread's stack whenever the loop is blocked too long."""
+
+    def __init__(self, threshold: float, interval: float = 0.05):
+        self.threshold = threshold
+        self.interval = interval
+        self.max_lag = 0.0
+        self.stalls = 0
+        self._last_beat = time.monotonic()
+        self._loop_thread: int | None = None
+        self._heartbeat: asyncio.Task | None = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._heartbeat is not None and not self._heartbeat.done()
+
+    def start(self) -> None:
+        self._loop_thread = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._heartbeat = asyncio.get_running_loop().create_task(self._beat())
+        threading.Thread(target=self._watch, name="loop-lag-monitor", daemon=True).start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+
+    async def _beat(self) -> None:
+        while True:
+            self._last_beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+
+    def _watch(self) -> None:
+        reported_beat = None
+        while not self._stop.wait(self.interval / 2):
+            beat = self._last_beat
+            lag = time.monotonic() - beat - self.interval
+            self.max_lag = max(self.max_lag, lag)
+            if lag < self.threshold or beat == reported_beat:
+                continue
+            # One report per stall, taken while the loop is still blocked.
+            reported_beat = beat
+            self.stalls += 1
+            frame = sys._current_frames().get(self._loop_thread)
+            stack = io.StringIO()
+            if frame is not None:
+                traceback.print_stack(frame, file=stack)
+            log.warning(
+                f"Event loop blocked for over {lag * 1000:.0f} ms. "
+                f"Loop thread stack:\n{stack.getvalue()}"
+            )
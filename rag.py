@@ -1,35 +1,353 @@
-"""RAG pipeline: ingest markdown docs into ChromaDB and retrieve relevant chunks."""
+"""RAG pipeline: ingest markdown docs into a vector store and retrieve relevant chunks."""
 
 import os
+import sys
+import asyncio
 import hashlib
+import logging
+import re
+import shutil
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
 
 import chromadb
 from chromadb.config import Settings
+from chromadb.utils import embedding_functions
+import numpy as np
 
 from config import Config
+from vectorstore import ChromaStore, NumpyStore, VectorStore, normalize
+
+log = logging.getLogger("apollo-bot.rag")
+
+_client: chromadb.ClientAPI | None = None
 
 
 def get_chroma_client() -> chromadb.ClientAPI:
-    """Create a persistent ChromaDB client."""
-    return chromadb.PersistentClient(
-        path=Config.CHROMA_PERSIST_DIR,
-        settings=Settings(anonymized_telemetry=False),
-    )
+    """Return the process-wide persistent ChromaDB client, opening it on first use."""
+    global _client
+    if _client is None:
+        _client = chromadb.PersistentClient(
+            path=Config.CHROMA_PERSIST_DIR,
+            settings=Settings(anonymized_telemetry=False),
+        )
+    return _client
 
 
-def get_collection(client: chromadb.ClientAPI) -> chromadb.Collection:
-    """Get or create the docs collection.
+def _reset_chroma_client() -> None:
+    """Drop the client so every collection it loaded is freed; the next call reopens it.
 
-    Uses ChromaDB's default embedding function (all-MiniLM-L6-v2)
-    which runs locally — no external API calls needed for embeddings.
+    Chroma keeps each collection it has opened in memory for the life of the
+    client, so this is the only way to unload one.
+    """
+    global _client
+    if _client is not None:
+        _client.clear_system_cache()  # otherwise the next client would reuse the same one
+        _client = None
+
+
+def get_collection(client: chromadb.ClientAPI, name: str = Config.CHROMA_COLLECTION) -> chromadb.Collection:
+    """Get or create a docs collection.
+
+    Embeddings are computed by rag.py (ChromaDB's default all-MiniLM-L6-v2,
+    which runs locally — no external API calls needed) and passed in explicitly.
     """
     return client.get_or_create_collection(
-        name=Config.CHROMA_COLLECTION,
+        name=name,
         metadata={"hnsw:space": "cosine"},
     )
 
 
+# ── Active index (blue/green) ───────────────────────────────────────
+
+# Each ingest builds a new index generation named "<base>_<timestamp>" and then
+# atomically repoints "<RAG_STATE_DIR>/<base>.<backend>.active" at it, so
+# retrieval only ever sees complete indexes. Every process re-reads the
+# pointer when its mtime changes and closes the generations it no longer needs.
+
+_active: dict[tuple[str, str], tuple[int, str]] = {}
+
+
+def _pointer_path(backend: str, base: str) -> str:
+    return os.path.join(Config.RAG_STATE_DIR, f"{base}.{backend}.active")
+
+
+def active_index(backend: str | None = None, base: str = Config.CHROMA_COLLECTION) -> str:
+    """Name of the index generation retrieval should use (the base name before the first swap)."""
+    backend = backend or Config.VECTOR_BACKEND
+    path = _pointer_path(backend, base)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return base
+    cached = _active.get((backend, base))
+    if cached is None or cached[0] != mtime:
+        previous = cached[1] if cached else None
+        cached = (mtime, Path(path).read_text(encoding="utf-8").strip() or base)
+        _active[(backend, base)] = cached
+        if previous is not None and previous != cached[1]:
+            # Swapped (possibly by another process): keep the previous
+            # generation for in-flight queries and close anything older.
+            _close_generations(backend, base, keep={cached[1], previous})
+    return cached[1]
+
+
+def _activate(backend: str, base: str, name: str) -> None:
+    path = _pointer_path(backend, base)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    Path(tmp).write_text(name, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+_stores: dict[tuple[str, str], VectorStore] = {}
+_store_used: dict[tuple[str, str], float] = {}
+# Guards _stores/_store_used: retrieval opens stores from worker threads.
+_stores_lock = threading.Lock()
+
+
+def get_store(backend: str | None = None, name: str | None = None) -> VectorStore:
+    """Return the vector store for `backend` (default: Config.VECTOR_BACKEND), opening it once.
+
+    `name` selects an index generation; defaults to the active one.
+    """
+    backend = backend or Config.VECTOR_BACKEND
+    name = name or active_index(backend)
+    key = (backend, name)
+    with _stores_lock:
+        _store_used[key] = time.monotonic()
+        store = _stores.get(key)
+        if store is None:
+            if backend == "chroma":
+                store = ChromaStore(get_collection(get_chroma_client(), name))
+            elif backend == "numpy":
+                store = NumpyStore(
+                    os.path.join(Config.NUMPY_STORE_DIR, name),
+                    dtype=Config.NUMPY_STORE_DTYPE,
+                )
+            else:
+                raise ValueError(f"Unknown VECTOR_BACKEND: {backend}")
+            _stores[key] = store
+    return store
+
+
+def evict_idle_stores(max_idle: float) -> list[str]:
+    """Close stores not used for `max_idle` seconds; they reopen on next use.
+
+    Chroma can only unload collections by reopening the client, so evicting
+    any Chroma store also closes the busy ones; they reload from disk on
+    their next query.
+
+    Returns the names of the evicted stores.
+    """
+    cutoff = time.monotonic() - max_idle
+    with _stores_lock:
+        idle = [key for key, used in _store_used.items() if used < cutoff]
+        for key in idle:
+            _stores.pop(key, None)
+            del _store_used[key]
+        if any(backend == "chroma" for backend, _ in idle):
+            for key in [k for k in _stores if k[0] == "chroma"]:
+                del _stores[key]
+            _reset_chroma_client()
+    return [name for _, name in idle]
+
+
+def _is_generation(name: str, base: str) -> bool:
+    # Exactly "<base>_<YYYYmmddHHMMSS>_<microseconds>" (see _ingest), so another
+    # index named e.g. "<base>_friends" is never mistaken for one of ours.
+    return name == base or re.fullmatch(rf"{re.escape(base)}_\d{{14}}_\d{{6}}", name) is not None
+
+
+def _close_generations(backend: str, base: str, keep: set[str]) -> None:
+    """Forget cached stores for `base`'s generations other than `keep`."""
+    with _stores_lock:
+        for key in [k for k in _stores if k[0] == backend and _is_generation(k[1], base)]:
+            if key[1] not in keep:
+                del _stores[key]
+                _store_used.pop(key, None)
+
+
+def _index_generations(backend: str, base: str) -> list[str]:
+    if backend == "chroma":
+        names = [getattr(c, "name", c) for c in get_chroma_client().list_collections()]
+    else:
+        root = Path(Config.NUMPY_STORE_DIR)
+        names = [p.name for p in root.iterdir() if p.is_dir()] if root.exists() else []
+    return [n for n in names if _is_generation(n, base)]
+
+
+def _drop_index(backend: str, name: str) -> None:
+    with _stores_lock:
+        _stores.pop((backend, name), None)
+        _store_used.pop((backend, name), None)
+    if backend == "chroma":
+        get_chroma_client().delete_collection(name)
+    else:
+        shutil.rmtree(os.path.join(Config.NUMPY_STORE_DIR, name), ignore_errors=True)
+
+
+# ── Query cache ─────────────────────────────────────────────────────
+
+
+class LRUCache:
+    """Thread-safe LRU cache bounded by entry count and approximate size in bytes."""
+
+    def __init__(self, max_entries: int, max_bytes: int, sizeof=sys.getsizeof):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._data: OrderedDict = OrderedDict()
+        self._sizes: dict = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value) -> None:
+        size = self._sizeof(value)
+        if self.max_entries <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._bytes -= self._sizes.pop(key)
+                del self._data[key]
+            self._data[key] = value
+            self._sizes[key] = size
+            self._bytes += size
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                old_key, _ = self._data.popitem(last=False)
+                self._bytes -= self._sizes.pop(old_key)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def _embedding_size(embedding: np.ndarray) -> int:
+    return sys.getsizeof(embedding) + embedding.nbytes
+
+
+def _results_size(results: list[dict]) -> int:
+    return sys.getsizeof(results) + sum(
+        sys.getsizeof(r) + len(r["text"]) + len(r["source"]) + len(r["section"])
+        for r in results
+    )
+
+
+_embedding_cache = LRUCache(
+    max_entries=Config.RAG_CACHE_MAX_ENTRIES,
+    max_bytes=Config.RAG_CACHE_MAX_BYTES // 2,
+    sizeof=_embedding_size,
+)
+_results_cache = LRUCache(
+    max_entries=Config.RAG_CACHE_MAX_ENTRIES,
+    max_bytes=Config.RAG_CACHE_MAX_BYTES // 2,
+    sizeof=_results_size,
+)
+
+# Bumped whenever ingest_docs() swaps in a new index; part of every results-cache key
+# along with the active index name (which also changes when another process swaps).
+_collection_version = 0
+
+_embedding_fn = None
+_embedding_fn_lock = threading.Lock()
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query for cache lookups: lowercase, collapse whitespace, drop trailing punctuation."""
+    return " ".join(query.lower().split()).rstrip("?!. ")
+
+
+def embed_texts(texts: list[str]) -> list[list[float]]:
+    """Embed texts with the local MiniLM model shared by all vector stores."""
+    global _embedding_fn
+    if _embedding_fn is None:
+        # warm_up() and the first query can both get here; load the model once.
+        with _embedding_fn_lock:
+            if _embedding_fn is None:
+                _embedding_fn = embedding_functions.DefaultEmbeddingFunction()
+    return [[float(x) for x in emb] for emb in _embedding_fn(texts)]
+
+
+def embed_query(query: str) -> np.ndarray:
+    """Embed a query as a unit-length float32 vector, using the LRU cache.
+
+    The cached array is shared between callers, so it is read-only.
+    """
+    key = normalize_query(query)
+    embedding = _embedding_cache.get(key)
+    if embedding is None:
+        embedding = normalize(np.asarray(embed_texts([key])[0], dtype=np.float32))
+        embedding.setflags(write=False)
+        _embedding_cache.put(key, embedding)
+    return embedding
+
+
+def warm_up(open_store: bool = True) -> dict[str, float]:
+    """Open the vector store and load the embedding model ahead of the first query.
+
+    With open_store=False (many guilds) only the shared embedding model is
+    loaded; each guild's store opens on its first query.
+
+    Returns per-phase timings in seconds.
+    """
+    timings = {}
+    if open_store:
+        start = time.perf_counter()
+        get_store().count()
+        timings["vector_store"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if _embedding_fn is None:
+        embed_query("warm up")
+    timings["embedding_model"] = time.perf_counter() - start
+    return timings
+
+
+def bump_collection_version() -> None:
+    """Invalidate cached retrieval results after the collection changes."""
+    global _collection_version
+    _collection_version += 1
+    _results_cache.clear()
+
+
+def cache_stats() -> dict:
+    """Hit-rate and size stats for the embedding and results caches."""
+    return {
+        "collection_version": _collection_version,
+        "embeddings": _embedding_cache.stats(),
+        "results": _results_cache.stats(),
+    }
+
+
 # ── Chunking ────────────────────────────────────────────────────────
 
 
@@ -103,14 +421,28 @@ def _split_on_headings(text: str) -> list[tuple[str, str]]:
 # ── Ingestion ───────────────────────────────────────────────────────
 
 
-def ingest_docs(docs_dir: str = "./docs") -> int:
-    """Ingest all markdown files from docs_dir into ChromaDB.
+_ingest_lock = threading.Lock()
+
+
+def ingest_docs(
+    docs_dir: str = "./docs",
+    backend: str | None = None,
+    collection: str | None = None,
+) -> int:
+    """Ingest all markdown files from docs_dir into a new index generation and swap it in.
+
+    Retrieval keeps using the current index until the new one is complete.
+    The previous generation is kept (in-flight queries may still use it) and
+    anything older is deleted. `collection` is the index's base name
+    (default: Config.CHROMA_COLLECTION), e.g. one per guild.
 
     Returns the number of chunks ingested.
     """
-    client = get_chroma_client()
-    collection = get_collection(client)
+    with _ingest_lock:
+        return _ingest(docs_dir, backend or Config.VECTOR_BACKEND, collection or Config.CHROMA_COLLECTION)
 
+
+def _ingest(docs_dir: str, backend: str, base: str) -> int:
     docs_path = Path(docs_dir)
     if not docs_path.exists():
         print(f"❌ Docs directory not found: {docs_dir}")
@@ -121,6 +453,10 @@ def ingest_docs(docs_dir: str = "./docs") -> int:
         print(f"⚠️  No .md files found in {docs_dir}")
         return 0
 
+    previous = active_index(backend, base)
+    name = f"{base}_{time.strftime('%Y%m%d%H%M%S')}_{time.time_ns() // 1000 % 1_000_000:06d}"
+    store = get_store(backend, name)
+
     total_chunks = 0
     for md_file in md_files:
         text = md_file.read_text(encoding="utf-8")
@@ -140,42 +476,193 @@ def ingest_docs(docs_dir: str = "./docs") -> int:
             ).hexdigest()
             ids.append(chunk_id)
             documents.append(chunk["text"])
-            metadatas.append({"source": chunk["source"], "section": chunk["section"]})
+            metadatas.append({"source": chunk["source"], "section": chunk["section"], "chunk": i})
 
-        collection.upsert(ids=ids, documents=documents, metadatas=metadatas)
+        store.upsert(ids, documents, metadatas, embed_texts(documents))
         total_chunks += len(chunks)
         print(f"  ✅ {relative_path}: {len(chunks)} chunks")
 
-    print(f"\n📚 Ingested {total_chunks} chunks from {len(md_files)} files.")
+    if total_chunks == 0:
+        _drop_index(backend, name)
+        print(f"⚠️  No chunks produced from {docs_dir}; keeping the current index.")
+        return 0
+
+    store.persist()
+    _activate(backend, base, name)
+    bump_collection_version()
+    for old in _index_generations(backend, base):
+        if old not in (name, previous):
+            _drop_index(backend, old)
+
+    print(f"\n📚 Ingested {total_chunks} chunks from {len(md_files)} files into {name}.")
     return total_chunks
 
 
+# ── Hot reload ──────────────────────────────────────────────────────
+
+
+def docs_snapshot(docs_dir: str) -> dict[str, tuple[int, int]]:
+    """Map each markdown file under docs_dir to (mtime_ns, size)."""
+    snapshot = {}
+    for md_file in Path(docs_dir).glob("**/*.md"):
+        try:
+            st = md_file.stat()
+        except FileNotFoundError:
+            continue
+        snapshot[str(md_file)] = (st.st_mtime_ns, st.st_size)
+    return snapshot
+
+
+async def watch_docs(
+    docs_dir: str = "./docs",
+    interval: float = Config.DOCS_WATCH_INTERVAL,
+    collection: str | None = None,
+) -> None:
+    """Poll docs_dir and re-ingest once changes have been quiet for one interval.
+
+    Ingestion runs in a thread and swaps the index atomically, so retrieval
+    keeps serving the old index until the new one is ready.
+    """
+    last = await asyncio.to_thread(docs_snapshot, docs_dir)
+    dirty = False
+    while True:
+        await asyncio.sleep(interval)
+        snapshot = await asyncio.to_thread(docs_snapshot, docs_dir)
+        if snapshot != last:
+            last, dirty = snapshot, True
+            continue
+        if dirty:
+            dirty = False
+            log.info(f"📝 Docs changed in {docs_dir}; rebuilding index...")
+            try:
+                count = await asyncio.to_thread(ingest_docs, docs_dir, None, collection)
+                log.info(f"✅ Swapped in new index ({count} chunks)")
+            except Exception as e:
+                log.error(f"Docs reload failed; keeping the current index: {e}", exc_info=True)
+
+
 # ── Retrieval ───────────────────────────────────────────────────────
 
 
-def retrieve(query: str, n_results: int = 5) -> list[dict]:
+def retrieve(query: str, n_results: int = 5, collection: str | None = None) -> list[dict]:
     """Retrieve the most relevant document chunks for a query.
 
+    Over-fetches candidates, merges overlapping chunks from the same section
+    and picks a diverse set with MMR (see _rerank).
+
     Returns a list of dicts with 'text', 'source', 'section', and 'distance'.
+    `collection` selects the index by base name (default: Config.CHROMA_COLLECTION).
+    Results are cached per (normalized query, n_results) until the next index swap.
     """
-    client = get_chroma_client()
-    collection = get_collection(client)
-
-    if collection.count() == 0:
+    index = active_index(base=collection or Config.CHROMA_COLLECTION)
+    key = (index, _collection_version, normalize_query(query), n_results)
+    cached = _results_cache.get(key)
+    if cached is not None:
+        return [dict(r) for r in cached]
+
+    store = get_store(name=index)
+    if store.count() == 0:
         return []
 
-    results = collection.query(query_texts=[query], n_results=n_results)
+    query_embedding = embed_query(query)
+    candidates = store.query(query_embedding, n_results * max(Config.RAG_OVERFETCH, 1))
+    retrieved = [
+        {k: r[k] for k in ("text", "source", "section", "distance")}
+        for r in _rerank(query_embedding, candidates, n_results)
+    ]
 
-    retrieved = []
-    for i in range(len(results["ids"][0])):
-        retrieved.append({
-            "text": results["documents"][0][i],
-            "source": results["metadatas"][0][i].get("source", "unknown"),
-            "section": results["metadatas"][0][i].get("section", ""),
-            "distance": results["distances"][0][i] if results["distances"] else None,
-        })
+    _results_cache.put(key, retrieved)
+    return [dict(r) for r in retrieved]
 
-    return retrieved
+
+# ── Re-ranking ──────────────────────────────────────────────────────
+
+
+def _rerank(query_embedding: np.ndarray, candidates: list[dict], n_results: int) -> list[dict]:
+    """Merge overlapping candidates, then select n_results with maximal marginal relevance."""
+    merged = _merge_overlapping(candidates)
+    if len(merged) <= 1:
+        return merged[:n_results]
+
+    q = query_embedding  # already unit length (embed_query)
+    vectors = np.stack([normalize(np.asarray(c["embedding"], dtype=np.float32)) for c in merged])
+    relevance = vectors @ q
+    similarity = vectors @ vectors.T
+
+    lam = Config.RAG_MMR_LAMBDA
+    selected = [int(np.argmax(relevance))]
+    remaining = set(range(len(merged))) - set(selected)
+    while remaining and len(selected) < n_results:
+        best = max(
+            remaining,
+            key=lambda i: lam * relevance[i] - (1 - lam) * similarity[i, selected].max(),
+        )
+        selected.append(best)
+        remaining.remove(best)
+
+    return [merged[i] for i in selected]
+
+
+def _merge_overlapping(candidates: list[dict]) -> list[dict]:
+    """Merge candidates that are adjacent or overlapping chunks of the same source and section.
+
+    The merged chunk keeps the best distance and the mean of the embeddings.
+    Output keeps the order of each group's best-ranked member.
+    """
+    groups: dict[tuple[str, str], list[dict]] = {}
+    for c in candidates:
+        groups.setdefault((c["source"], c["section"]), []).append(c)
+
+    merged: list[dict] = []
+    for members in groups.values():
+        members.sort(key=lambda c: (c.get("chunk") is None, c.get("chunk") or 0))
+        run = [members[0]]
+        for c in members[1:]:
+            prev = run[-1]
+            adjacent = (
+                c.get("chunk") is not None
+                and prev.get("chunk") is not None
+                and c["chunk"] - prev["chunk"] <= 1
+            )
+            if adjacent or _overlap_length(prev["text"], c["text"]) >= _MIN_OVERLAP:
+                run.append(c)
+            else:
+                merged.append(_combine(run))
+                run = [c]
+        merged.append(_combine(run))
+
+    merged.sort(key=lambda c: c["distance"] if c["distance"] is not None else float("inf"))
+    return merged
+
+
+_MIN_OVERLAP = 40
+
+
+def _overlap_length(a: str, b: str, max_overlap: int = 400) -> int:
+    """Length of the longest suffix of `a` that is a prefix of `b`."""
+    for k in range(min(len(a), len(b), max_overlap), 0, -1):
+        if a.endswith(b[:k]):
+            return k
+    return 0
+
+
+def _combine(run: list[dict]) -> dict:
+    if len(run) == 1:
+        return run[0]
+    text = run[0]["text"]
+    for c in run[1:]:
+        k = _overlap_length(text, c["text"])
+        text = text + c["text"][k:] if k >= _MIN_OVERLAP else text + "\n\n" + c["text"]
+    distances = [c["distance"] for c in run if c["distance"] is not None]
+    embedding = np.mean([normalize(np.asarray(c["embedding"], dtype=np.float32)) for c in run], axis=0)
+    return {
+        "text": text,
+        "source": run[0]["source"],
+        "section": run[0]["section"],
+        "chunk": run[-1].get("chunk"),
+        "distance": min(distances) if distances else None,
+        "embedding": embedding,
+    }
 
 
 # ── CLI entrypoint ──────────────────────────────────────────────────
@@ -0,0 +1,70 @@
+"""Model tiering: pick a fast or large Claude model for each call in a turn.
+
+The fast tier handles doc-only answers and tool selection. A turn escalates
+to the large tier when the question looks complex or ambiguous, once it has
+needed several tool calls, or when a fast response ran out of tokens.
+Per-tier latency and token usage are recorded so the policy can be tuned.
+"""
+
+import re
+
+from config import Config
+
+TIERS = {
+    "fast": Config.CLAUDE_MODEL_FAST,
+    "large": Config.CLAUDE_MODEL,
+}
+
+# Phrases that usually mean the user wants reasoning rather than a lookup.
+_COMPLEX = re.compile(
+    r"\b(why|how come|explain|compare|difference|versus|vs\.?|recommend|should i|"
+    r"troubleshoot|not working|doesn'?t work|broken|error|keeps?)\b",
+    re.IGNORECASE,
+)
+
+
+def initial_tier(user_message: str, conversation_history: list[dict] | None) -> str:
+    """Tier for the first call of a turn."""
+    if not Config.MODEL_ROUTING:
+        return "large"
+    if len(user_message) > 400 or user_message.count("?") > 1:
+        return "large"
+    if _COMPLEX.search(user_message):
+        return "large"
+    # Long threads are where context gets ambiguous ("the new one", "that show").
+    if conversation_history and len(conversation_history) >= 6:
+        return "large"
+    return "fast"
+
+
+def next_tier(tier: str, tool_calls: int) -> str:
+    """Tier for the call after a round of tool results; never de-escalates."""
+    if tier == "large" or tool_calls >= Config.ESCALATE_AFTER_TOOL_CALLS:
+        return "large"
+    return tier
+
+
+def should_escalate(tier: str, response) -> bool:
+    """Whether to redo a fast-tier call on the large tier."""
+    return tier == "fast" and response.stop_reason == "max_tokens"
+
+
+# ── Stats ───────────────────────────────────────────────────────────
+
+tier_stats: dict[str, dict] = {
+    tier: {"calls": 0, "latency": 0.0, "input_tokens": 0, "output_tokens": 0, "escalations": 0}
+    for tier in TIERS
+}
+
+
+def record(tier: str, latency: float, usage) -> None:
+    stats = tier_stats[tier]
+    stats["calls"] += 1
+    stats["latency"] += latency
+    if usage is not None:
+        stats["input_tokens"] += usage.input_tokens
+        stats["output_tokens"] += usage.output_tokens
+
+
+def record_escalation(from_tier: str) -> None:
+    tier_stats[from_tier]["escalations"] += 1
@@ -0,0 +1,217 @@
+"""Adaptive concurrency, retries and rate budgets for Anthropic API calls.
+
+Every messages.create goes through AnthropicThrottle.call():
+
+- Concurrency is AIMD-controlled: the in-flight limit grows by about one per
+  round of successful calls and shrinks by a quarter on a 429 (rate limited)
+  or 529 (overloaded). Only calls admitted since the last decrease can
+  shrink it again, so a burst of failures from the same moment counts once.
+  Growth slows right below the limit where the last 429 happened, so the
+  limiter settles close to the account's capacity instead of repeatedly
+  overshooting it.
+- retry-after delays the call that got it. All new calls pause only when the
+  API asks for a long wait or keeps rejecting calls back to back.
+- Failed calls are retried with full-jitter exponential backoff; the SDK's
+  own retries are disabled so they can't stack with these.
+- Optional RPM and input/output TPM budgets are enforced over a sliding
+  minute, so calls wait for room instead of being rejected upstream.
+
+Limits are per process: with several workers, divide the account limits
+between them.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+
+import anthropic
+
+from config import Config
+
+log = logging.getLogger("apollo-bot.throttle")
+
+_RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+_BACKOFF_BASE = 0.5
+_BACKOFF_CAP = 20.0
+_DECREASE_FACTOR = 0.75
+# Growth rate (relative to normal) within one call of the last throttled limit.
+_NEAR_CEILING_GROWTH = 0.1
+# A retry-after this long, or this many throttled calls in a row, pauses everyone.
+_LONG_RETRY_AFTER = 10.0
+_PAUSE_AFTER_THROTTLES = 3
+
+
+class ModelBusy(Exception):
+    """Raised when an Anthropic call still fails after all retries."""
+
+
+class MinuteBudget:
+    """A sliding one-minute budget (requests or tokens); 0 means unlimited."""
+
+    def __init__(self, per_minute: int):
+        self.per_minute = per_minute
+        self._events: deque[list] = deque()  # [timestamp, amount]
+
+    def used(self) -> int:
+        cutoff = time.monotonic() - 60
+        while self._events and self._events[0][0] < cutoff:
+            self._events.popleft()
+        return sum(amount for _, amount in self._events)
+
+    def wait_time(self, amount: int) -> float:
+        """Seconds until `amount` fits (0 if it fits now)."""
+        if not self.per_minute or not self._events:
+            return 0.0
+        excess = self.used() + amount - self.per_minute
+        if excess <= 0:
+            return 0.0
+        # Wait until enough of the oldest usage has aged out.
+        for timestamp, used in self._events:
+            excess -= used
+            if excess <= 0:
+                return max(0.0, timestamp + 60 - time.monotonic())
+        return 60.0
+
+    def spend(self, amount: int) -> list:
+        event = [time.monotonic(), amount]
+        self._events.append(event)
+        return event
+
+
+def _estimate_input_tokens(kwargs: dict) -> int:
+    """Rough input size (about 4 characters per token) before the call is made."""
+    return len(str(kwargs.get("system", ""))) // 4 + len(str(kwargs.get("messages", []))) // 4 + (
+        len(str(kwargs.get("tools", []))) // 4
+    )
+
+
+def _retry_after(exc: Exception) -> float | None:
+    response = getattr(exc, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after", ""))
+    except ValueError:
+        return None
+
+
+class AnthropicThrottle:
+    def __init__(self):
+        self.limit = float(Config.ANTHROPIC_MAX_CONCURRENCY)
+        self.in_flight = 0
+        self.rpm = MinuteBudget(Config.ANTHROPIC_RPM)
+        self.input_tpm = MinuteBudget(Config.ANTHROPIC_INPUT_TPM)
+        self.output_tpm = MinuteBudget(Config.ANTHROPIC_OUTPUT_TPM)
+        # budget_waits: calls held back by a rate budget or retry-after pause
+        self.stats = {"calls": 0, "throttled": 0, "retries": 0, "failed": 0, "budget_waits": 0}
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._ceiling: float | None = None  # limit when the last 429/529 happened
+        self._throttled_in_a_row = 0
+        self._changed = asyncio.Condition()
+
+    # ── Admission ───────────────────────────────────────────────────
+
+    def _wait_time(self, input_tokens: int, output_tokens: int) -> float:
+        return max(
+            self._paused_until - time.monotonic(),
+            self.rpm.wait_time(1),
+            self.input_tpm.wait_time(input_tokens),
+            self.output_tpm.wait_time(output_tokens),
+        )
+
+    async def _acquire(self, input_tokens: int, output_tokens: int) -> None:
+        async with self._changed:
+            counted = False
+            while True:
+                wait = self._wait_time(input_tokens, output_tokens)
+                if wait <= 0 and self.in_flight < int(self.limit):
+                    break
+                if wait > 0 and not counted:
+                    counted = True
+                    self.stats["budget_waits"] += 1
+                try:
+                    # Woken early by releases; otherwise re-check once budgets free up.
+                    await asyncio.wait_for(self._changed.wait(), wait if wait > 0 else None)
+                except asyncio.TimeoutError:
+                    pass
+            self.in_flight += 1
+
+    async def _release(self) -> None:
+        async with self._changed:
+            self.in_flight -= 1
+            self._changed.notify_all()
+
+    # ── AIMD ────────────────────────────────────────────────────────
+
+    def _on_success(self) -> None:
+        self._throttled_in_a_row = 0
+        step = 1 / self.limit
+        if self._ceiling is not None:
+            if self.limit + 1 >= self._ceiling:
+                step *= _NEAR_CEILING_GROWTH
+            if self.limit > self._ceiling + 1:
+                self._ceiling = None  # capacity has grown; probe at full speed again
+        self.limit = min(Config.ANTHROPIC_MAX_CONCURRENCY, self.limit + step)
+
+    def _on_throttled(self, retry_after: float | None, admitted_at: float) -> None:
+        self.stats["throttled"] += 1
+        self._throttled_in_a_row += 1
+        now = time.monotonic()
+        if retry_after and (
+            retry_after >= _LONG_RETRY_AFTER or self._throttled_in_a_row >= _PAUSE_AFTER_THROTTLES
+        ):
+            self._paused_until = max(self._paused_until, now + retry_after)
+        # Calls admitted before the last decrease were sent under the old limit.
+        if admitted_at >= self._last_decrease:
+            self._last_decrease = now
+            self._ceiling = self.limit
+            self.limit = max(1.0, self.limit * _DECREASE_FACTOR)
+            log.warning(f"🐢 Anthropic throttled; concurrency limit now {int(self.limit)}")
+
+    # ── Calls ───────────────────────────────────────────────────────
+
+    async def call(self, create, **kwargs):
+        """Run `await create(**kwargs)` (a messages.create) under the limits, with retries."""
+        input_tokens = _estimate_input_tokens(kwargs)
+        output_tokens = kwargs.get("max_tokens", 0) // 4
+        for attempt in range(Config.ANTHROPIC_RETRIES + 1):
+            await self._acquire(input_tokens, output_tokens)
+            admitted_at = time.monotonic()
+            self.stats["calls"] += 1
+            self.rpm.spend(1)
+            input_spent = self.input_tpm.spend(input_tokens)
+            output_spent = self.output_tpm.spend(output_tokens)
+            try:
+                response = await create(**kwargs)
+            except (anthropic.APIStatusError, anthropic.APIConnectionError) as e:
+                input_spent[1] = output_spent[1] = 0
+                status = getattr(e, "status_code", None)
+                if status is not None and status not in _RETRY_STATUS:
+                    raise
+                retry_after = _retry_after(e)
+                if status in (429, 529):
+                    self._on_throttled(retry_after, admitted_at)
+                if attempt == Config.ANTHROPIC_RETRIES:
+                    self.stats["failed"] += 1
+                    raise ModelBusy(f"Anthropic API unavailable after {attempt + 1} attempts: {e}") from e
+            else:
+                # Replace the estimates with what was actually used.
+                usage = getattr(response, "usage", None)
+                if usage is not None:
+                    input_spent[1] = usage.input_tokens
+                    output_spent[1] = usage.output_tokens
+                self._on_success()
+                return response
+            finally:
+                await self._release()
+
+            # Back off without holding a concurrency slot; retry-after applies to this call.
+            self.stats["retries"] += 1
+            backoff = random.uniform(0, min(_BACKOFF_CAP, _BACKOFF_BASE * 2**attempt))
+            await asyncio.sleep(max(backoff, retry_after or 0.0))
+
+
+throttle = AnthropicThrottle()
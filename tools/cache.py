@@ -0,0 +1,56 @@
+"""Short-lived cache for tool calls that bypass the LLM (slash commands).
+
+Entries are keyed by the tool function and its arguments and expire after a
+TTL. Concurrent misses for the same key share one upstream call, so a burst
+of /queue commands costs one request to each service.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+from config import Config
+
+
+def _name(fn: Callable) -> str:
+    return f"{fn.__module__}.{fn.__name__}"
+
+
+class ToolCache:
+    def __init__(self, ttl: float, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, tuple[float, asyncio.Future]] = OrderedDict()
+
+    async def call(self, fn: Callable[..., Awaitable], *args, ttl: float | None = None):
+        """Return fn(*args), reusing a cached or in-flight result when there is one."""
+        key = (_name(fn), args)
+        entry = self._entries.get(key)
+        if entry is not None and (not entry[1].done() or entry[0] > time.monotonic()):
+            self._entries.move_to_end(key)
+            return await asyncio.shield(entry[1])
+
+        future = asyncio.ensure_future(fn(*args))
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), future)
+        future.add_done_callback(lambda f: self._drop_failed(key, f))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return await asyncio.shield(future)
+
+    def _drop_failed(self, key: tuple, future: asyncio.Future) -> None:
+        # Errors are never cached; the next call retries upstream.
+        if future.cancelled() or future.exception() is not None:
+            if self._entries.get(key, (None, None))[1] is future:
+                del self._entries[key]
+
+    def invalidate(self, *fns: Callable) -> int:
+        """Drop cached results for the given tool functions (all entries if none given)."""
+        names = {_name(fn) for fn in fns}
+        stale = [key for key in self._entries if not names or key[0] in names]
+        for key in stale:
+            del self._entries[key]
+        return len(stale)
+
+
+tool_cache = ToolCache(ttl=Config.TOOL_CACHE_TTL)
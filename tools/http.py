@@ -0,0 +1,188 @@
+"""Shared HTTP layer for the service API wrappers.
+
+All tools reuse one aiohttp ClientSession (and its connection pool) and go
+through get_json(), which adds per-service timeouts, bounded retries with
+jitter for GETs, and a per-service circuit breaker. While a breaker is open,
+calls fail fast with the last good response for the same request, or raise
+ServiceUnavailable if there is none.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections import OrderedDict
+
+import aiohttp
+
+from config import Config
+
+log = logging.getLogger("apollo-bot.http")
+
+SERVICES = {
+    "media_requests": ("media request service", Config.MEDIA_REQUESTS_URL, Config.MEDIA_REQUESTS_TIMEOUTS),
+    "movies": ("movie service", Config.MOVIE_SERVICE_URL, Config.MOVIE_SERVICE_TIMEOUTS),
+    "shows": ("TV service", Config.TV_SERVICE_URL, Config.TV_SERVICE_TIMEOUTS),
+    "activity": ("activity monitor", Config.ACTIVITY_SERVICE_URL, Config.ACTIVITY_SERVICE_TIMEOUTS),
+}
+
+_session: aiohttp.ClientSession | None = None
+
+
+class ServiceUnavailable(Exception):
+    """Raised when a service's circuit breaker is open and no cached result exists."""
+
+
+def get_session() -> aiohttp.ClientSession:
+    """Return the shared session, creating it on first use inside the running loop."""
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit_per_host=10, ttl_dns_cache=300),
+        )
+    return _session
+
+
+async def close_session() -> None:
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+# ── Circuit breaker ─────────────────────────────────────────────────
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker.
+
+    closed -> open after `failure_threshold` failures in a row; open -> half-open
+    after `reset_seconds`, letting one probe through; the probe's outcome closes
+    or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def release_probe(self) -> None:
+        """The probe ended without an outcome (cancelled); let the next call probe."""
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._probing or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+
+breakers = {
+    name: CircuitBreaker(Config.BREAKER_FAILURE_THRESHOLD, Config.BREAKER_RESET_SECONDS)
+    for name in SERVICES
+}
+
+# Last good response per (service, url, params), served while a breaker is open.
+_last_good: OrderedDict = OrderedDict()
+_LAST_GOOD_MAX = 256
+
+
+def _retryable(exc: Exception) -> bool:
+    if isinstance(exc, aiohttp.ClientResponseError):
+        return exc.status >= 500 or exc.status == 429
+    return isinstance(exc, (aiohttp.ClientError, asyncio.TimeoutError))
+
+
+async def get_json(
+    service: str,
+    url: str,
+    headers: dict | None = None,
+    params: dict | None = None,
+) -> dict | list:
+    """GET `url` from `service` and return the decoded JSON body."""
+    label, _, (connect_timeout, read_timeout) = SERVICES[service]
+    breaker = breakers[service]
+    cache_key = (service, url, tuple(sorted((params or {}).items())))
+
+    probe = breaker.state == "half-open"
+    if not breaker.allow():
+        if cache_key in _last_good:
+            log.warning(f"{label} circuit open; serving last good response for {url}")
+            return _last_good[cache_key]
+        raise ServiceUnavailable(
+            f"The {label} is temporarily unavailable. Please try again in a minute."
+        )
+
+    timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+    try:
+        for attempt in range(Config.SERVICE_RETRIES + 1):
+            try:
+                async with get_session().get(url, headers=headers, params=params, timeout=timeout) as resp:
+                    resp.raise_for_status()
+                    data = await resp.json()
+            except Exception as e:
+                if not _retryable(e):
+                    # The service answered (e.g. 404); it is up, the request was just bad.
+                    breaker.record_success()
+                    raise
+                if attempt == Config.SERVICE_RETRIES:
+                    breaker.record_failure()
+                    if breaker.state != "closed":
+                        log.warning(f"{label} circuit opened after {breaker.failures} failures: {e!r}")
+                    raise
+                # Full jitter: 0 .. 0.25s, 0.5s, 1s, ...
+                await asyncio.sleep(random.uniform(0, 0.25 * 2**attempt))
+            else:
+                breaker.record_success()
+                _last_good[cache_key] = data
+                _last_good.move_to_end(cache_key)
+                if len(_last_good) > _LAST_GOOD_MAX:
+                    _last_good.popitem(last=False)
+                return data
+    except asyncio.CancelledError:
+        # Deadlines, unused prefetches and debounce restarts cancel calls
+        # routinely; a cancelled probe says nothing about the service.
+        if probe:
+            breaker.release_probe()
+        raise
+
+
+async def warm_up() -> dict[str, bool]:
+    """Open the shared session and touch each service so DNS and connections are ready.
+
+    Returns whether each service answered; failures are not fatal.
+    """
+    session = get_session()
+    reachable = {}
+    for name, (_, url, _) in SERVICES.items():
+        try:
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=5)) as resp:
+                await resp.read()
+                reachable[name] = True
+        except Exception:
+            reachable[name] = False
+    return reachable
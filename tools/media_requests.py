@@ -1,7 +1,9 @@
 """Media request service API wrapper for Apollo Bot tool calls."""
 
-import aiohttp
 from config import Config
+from tools.http import get_json
+from tools.request_mirror import request_mirror
+from tools.results import ToolResult
 
 HEADERS = {
     "X-Api-Key": Config.MEDIA_REQUESTS_API_KEY,
@@ -12,107 +14,199 @@ HEADERS = {
 async def _get(endpoint: str, params: dict | None = None) -> dict | list:
     """Make a GET request to the media request service API."""
     url = f"{Config.MEDIA_REQUESTS_URL}/api/v1{endpoint}"
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers=HEADERS, params=params) as resp:
-            resp.raise_for_status()
-            return await resp.json()
+    return await get_json("media_requests", url, headers=HEADERS, params=params)
 
 
-async def search_media(query: str) -> str:
+async def search_media(query: str) -> ToolResult:
     """Search for movies and TV shows in the media request service."""
     data = await _get("/search", params={"query": query, "page": 1, "language": "en"})
     results = data.get("results", [])[:5]
 
-    if not results:
-        return f"No results found for '{query}'."
-
-    lines = []
+    records = []
     for item in results:
-        media_type = item.get("mediaType", "unknown")
-        title = item.get("title") or item.get("name", "Unknown")
-        year = (item.get("releaseDate") or item.get("firstAirDate") or "")[:4]
-        status = _media_status(item.get("mediaInfo", {}))
-        lines.append(f"• **{title}** ({year}) [{media_type}] — {status}")
-
-    return "**Search Results:**\n" + "\n".join(lines)
-
-
-async def get_requests(status: str = "all", count: int = 10) -> str:
-    """Get recent media requests from the media request service.
+        records.append({
+            "title": item.get("title") or item.get("name", "Unknown"),
+            "year": (item.get("releaseDate") or item.get("firstAirDate") or "")[:4],
+            "type": item.get("mediaType", "unknown"),
+            "status": _media_status(item.get("mediaInfo", {})),
+            "tmdb_id": item.get("id"),
+        })
+
+    return ToolResult(
+        "search",
+        records,
+        lambda r: f"• **{r['title']}** ({r['year']}) [{r['type']}] — {_badge(r['status'])}",
+        title="**Search Results:**",
+        empty=f"No results found for '{query}'.",
+        fields=["title", "year", "type", "status"],
+    )
+
+
+async def get_requests(status: str = "all", count: int = 10, requested_by: str | None = None) -> ToolResult:
+    """Get recent media requests, from the local mirror when it is fresh.
 
     status: 'all', 'pending', 'approved', 'available', 'processing'
+    requested_by: only requests by this user (display name)
     """
-    params = {"take": count, "skip": 0, "sort": "added"}
-    if status != "all":
-        filter_map = {
-            "pending": "pendingapproval",
-            "approved": "approved",
-            "available": "available",
-            "processing": "processing",
-        }
-        params["filter"] = filter_map.get(status, status)
-
-    data = await _get("/request", params=params)
-    results = data.get("results", [])
-
-    if not results:
-        return f"No {status} requests found."
-
-    lines = []
+    note = None
+    if request_mirror.ready and status in LOCAL_FILTERS:
+        kind, codes = None, None
+        if LOCAL_FILTERS[status]:
+            kind, labels = LOCAL_FILTERS[status]
+            table = REQUEST_STATUS if kind == "request" else MEDIA_STATUS
+            codes = {code for code, label in table.items() if label in labels}
+        results = request_mirror.select(kind, codes, requested_by)[:count]
+        note = _synced()
+    else:
+        params = {"take": count, "skip": 0, "sort": "added"}
+        if status != "all":
+            filter_map = {
+                "pending": "pendingapproval",
+                "approved": "approved",
+                "available": "available",
+                "processing": "processing",
+            }
+            params["filter"] = filter_map.get(status, status)
+
+        data = await _get("/request", params=params)
+        results = data.get("results", [])
+        if requested_by:
+            results = [
+                r for r in results
+                if (r.get("requestedBy") or {}).get("displayName", "").casefold() == requested_by.casefold()
+            ]
+
+    records = []
     for req in results:
         media = req.get("media", {})
-        media_type = req.get("type", "unknown")
-        title = media.get("title") or media.get("name") or f"ID:{media.get('tmdbId', '?')}"
-        req_status = _request_status(req.get("status", 0))
-        requested_by = req.get("requestedBy", {}).get("displayName", "Unknown")
-        lines.append(f"• **{title}** [{media_type}] — {req_status} (by {requested_by})")
-
-    return f"**Recent Requests ({status}):**\n" + "\n".join(lines)
-
-
-async def get_request_by_title(title: str) -> str:
-    """Look up the status of a specific request by searching for it."""
-    # First search for the media
+        records.append({
+            "title": (
+                req.get("title") or media.get("title") or media.get("name")
+                or f"ID:{media.get('tmdbId', '?')}"
+            ),
+            "type": req.get("type", "unknown"),
+            "status": _request_status(req.get("status", 0)),
+            "requested_by": req.get("requestedBy", {}).get("displayName", "Unknown"),
+        })
+
+    return ToolResult(
+        "requests",
+        records,
+        lambda r: f"• **{r['title']}** [{r['type']}] — {_badge(r['status'])} (by {r['requested_by']})",
+        title=f"**Recent Requests ({status}):**",
+        empty=f"No {status} requests found.",
+        note=note,
+    )
+
+
+async def get_request_by_title(title: str) -> ToolResult:
+    """Look up the status of a specific request, from the local mirror when possible."""
+    if request_mirror.ready:
+        matches = request_mirror.find_title(title)
+        if matches:
+            req = matches[0]
+            return ToolResult(
+                "request_status",
+                [{
+                    "title": req["title"],
+                    "status": _media_status(req.get("media") or {}),
+                    "requested_by": (req.get("requestedBy") or {}).get("displayName", "Someone"),
+                }],
+                _render_request_status,
+                note=_synced(),
+            )
+
+    # No exact match (a partial title, or not requested yet), or the mirror
+    # isn't synced: search the service
     data = await _get("/search", params={"query": title, "page": 1, "language": "en"})
     results = data.get("results", [])
 
+    records = []
     for item in results:
         media_info = item.get("mediaInfo")
         if media_info:
-            name = item.get("title") or item.get("name", "Unknown")
-            status = _media_status(media_info)
             requests = media_info.get("requests", [])
-            detail = ""
-            if requests:
-                req = requests[0]
-                requested_by = req.get("requestedBy", {}).get("displayName", "Someone")
-                detail = f" | Requested by: {requested_by}"
-            return f"**{name}**: {status}{detail}"
+            records.append({
+                "title": item.get("title") or item.get("name", "Unknown"),
+                "status": _media_status(media_info),
+                "requested_by": (
+                    requests[0].get("requestedBy", {}).get("displayName", "Someone")
+                    if requests else None
+                ),
+            })
+            break
+
+    return ToolResult(
+        "request_status",
+        records,
+        _render_request_status,
+        empty=f"Could not find any request matching '{title}'. It may not have been requested yet.",
+    )
+
+
+def _render_request_status(r: dict) -> str:
+    detail = f" | Requested by: {r['requested_by']}" if r["requested_by"] else ""
+    return f"**{r['title']}**: {_badge(r['status'])}{detail}"
+
+
+MEDIA_STATUS = {
+    1: "unknown",
+    2: "pending approval",
+    3: "processing",
+    4: "partially available",
+    5: "available",
+}
 
-    return f"Could not find any request matching '{title}'. It may not have been requested yet."
+REQUEST_STATUS = {
+    0: "pending approval",
+    1: "approved",
+    2: "available",
+    3: "declined",
+}
+
+BADGES = {
+    "not requested": "Not requested",
+    "unknown": "🟡 Unknown",
+    "pending approval": "🟠 Pending approval",
+    "processing": "⏳ Processing (downloading/transcoding)",
+    "partially available": "🟢 Partially available",
+    "available": "✅ Available",
+    "approved": "🟠 Approved",
+    "declined": "❌ Declined",
+}
+
+
+# get_requests status filter -> (which status field, labels), for the local mirror
+LOCAL_FILTERS = {
+    "all": None,
+    "pending": ("request", ["pending approval"]),
+    "approved": ("request", ["approved"]),
+    "available": ("media", ["available", "partially available"]),
+    "processing": ("media", ["processing"]),
+}
+
+
+def _synced() -> str:
+    """Freshness note for results served from the mirror."""
+    age = int(request_mirror.age() or 0)
+    if age < 60:
+        return f"synced {age}s ago"
+    return f"synced {age // 60} min ago"
 
 
 def _media_status(media_info: dict) -> str:
-    """Convert media status codes to human-readable text."""
+    """Convert media status codes to a plain status label."""
     if not media_info:
-        return "Not requested"
+        return "not requested"
     status = media_info.get("status", 0)
-    status_map = {
-        1: "🟡 Unknown",
-        2: "🟠 Pending approval",
-        3: "⏳ Processing (downloading/transcoding)",
-        4: "🟢 Partially available",
-        5: "✅ Available",
-    }
-    return status_map.get(status, f"Status code: {status}")
+    return MEDIA_STATUS.get(status, f"status {status}")
 
 
 def _request_status(status_code: int) -> str:
-    """Convert request status code to human-readable text."""
-    status_map = {
-        0: "🟡 Pending approval",
-        1: "🟠 Approved",
-        2: "✅ Available",
-        3: "❌ Declined",
-    }
-    return status_map.get(status_code, f"Status: {status_code}")
+    """Convert request status code to a plain status label."""
+    return REQUEST_STATUS.get(status_code, f"status {status_code}")
+
+
+def _badge(label: str) -> str:
+    """Human-friendly, emoji-decorated status for Discord."""
+    return BADGES.get(label, label.capitalize())
@@ -1,7 +1,8 @@
 """Movie service API wrapper for Apollo Bot tool calls."""
 
-import aiohttp
 from config import Config
+from tools.http import get_json
+from tools.results import ToolResult
 
 HEADERS = {
     "X-Api-Key": Config.MOVIE_SERVICE_API_KEY,
@@ -11,70 +12,86 @@ HEADERS = {
 
 async def _get(endpoint: str, params: dict | None = None) -> dict | list:
     url = f"{Config.MOVIE_SERVICE_URL}/api/v3{endpoint}"
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers=HEADERS, params=params) as resp:
-            resp.raise_for_status()
-            return await resp.json()
+    return await get_json("movies", url, headers=HEADERS, params=params)
 
 
-async def get_queue() -> str:
+async def get_queue() -> ToolResult:
     """Get the current Movie download queue."""
     data = await _get("/queue", params={"pageSize": 10, "sortKey": "progress", "sortDirection": "ascending"})
     records = data.get("records", [])
 
-    if not records:
-        return "The Movie download queue is empty — nothing is currently downloading."
-
-    lines = []
+    rows = []
     for item in records:
-        title = item.get("title", "Unknown")
-        status = item.get("status", "unknown")
         progress = item.get("sizeleft", 0)
         size = item.get("size", 1)
-        pct = round((1 - progress / size) * 100, 1) if size > 0 else 0
-        time_left = item.get("timeleft", "unknown")
-        lines.append(f"• **{title}** — {status} | {pct}% done | ETA: {time_left}")
-
-    return "**Movie Download Queue:**\n" + "\n".join(lines)
+        rows.append({
+            "title": item.get("title", "Unknown"),
+            "status": item.get("status", "unknown"),
+            "pct": round((1 - progress / size) * 100, 1) if size > 0 else 0,
+            "eta": item.get("timeleft", "unknown"),
+        })
+
+    return ToolResult(
+        "movie_queue",
+        rows,
+        lambda r: f"• **{r['title']}** — {r['status']} | {r['pct']}% done | ETA: {r['eta']}",
+        title="**Movie Download Queue:**",
+        empty="The Movie download queue is empty — nothing is currently downloading.",
+    )
 
 
-async def lookup_movie(title: str) -> str:
+async def lookup_movie(title: str) -> ToolResult:
     """Look up a movie in Movie's library."""
     movies = await _get("/movie/lookup", params={"term": title})
 
-    if not movies:
-        return f"No movie found matching '{title}' in Movie."
-
     # Check top results
-    lines = []
-    for movie in movies[:3]:
-        name = movie.get("title", "Unknown")
-        year = movie.get("year", "?")
-        monitored = movie.get("monitored", False)
+    rows = []
+    for movie in (movies or [])[:3]:
         has_file = movie.get("hasFile", False)
-        quality = movie.get("movieFile", {}).get("quality", {}).get("quality", {}).get("name", "N/A")
-
         if has_file:
-            status = f"✅ Downloaded ({quality})"
-        elif monitored:
-            status = "⏳ Monitored (waiting for download)"
+            status = "downloaded"
+        elif movie.get("monitored", False):
+            status = "monitored"
         else:
-            status = "Not in library"
+            status = "not in library"
+        rows.append({
+            "title": movie.get("title", "Unknown"),
+            "year": movie.get("year", "?"),
+            "status": status,
+            "quality": (
+                movie.get("movieFile", {}).get("quality", {}).get("quality", {}).get("name")
+                if has_file else None
+            ),
+        })
+
+    return ToolResult(
+        "movie_lookup",
+        rows,
+        _render_lookup,
+        title="**Movie Lookup:**",
+        empty=f"No movie found matching '{title}' in Movie.",
+    )
 
-        lines.append(f"• **{name}** ({year}) — {status}")
 
-    return "**Movie Lookup:**\n" + "\n".join(lines)
+def _render_lookup(r: dict) -> str:
+    if r["status"] == "downloaded":
+        status = f"✅ Downloaded ({r['quality'] or 'N/A'})"
+    elif r["status"] == "monitored":
+        status = "⏳ Monitored (waiting for download)"
+    else:
+        status = "Not in library"
+    return f"• **{r['title']}** ({r['year']}) — {status}"
 
 
-async def get_system_status() -> str:
+async def get_system_status() -> ToolResult:
     """Get Movie system health status."""
     status = await _get("/system/status")
     health = await _get("/health")
 
-    version = status.get("version", "?")
     issues = [h.get("message", "") for h in health] if health else ["No issues"]
 
-    return (
-        f"**Movie Status:** v{version}\n"
-        f"**Health:** {'; '.join(issues)}"
+    return ToolResult(
+        "movie_system",
+        [{"version": status.get("version", "?"), "health": "; ".join(issues)}],
+        lambda r: f"**Movie Status:** v{r['version']}\n**Health:** {r['health']}",
     )
@@ -0,0 +1,223 @@
+"""Local mirror of every request in the media request service.
+
+A background task pages /request sorted by last modification and stops at the
+first request older than the newest one already seen, so a routine sync costs
+one page. A full resync every REQUEST_MIRROR_FULL_SYNC_SECONDS picks up
+deletions. Requests are indexed by title, TMDB id, requester and status so
+status lookups and filtered lists never have to touch the service.
+
+Request objects don't include the media title, so titles are looked up once
+per TMDB id and kept for the life of the process.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from collections import defaultdict
+
+from config import Config
+from tools.http import get_json
+
+log = logging.getLogger("apollo-bot.requests")
+
+HEADERS = {
+    "X-Api-Key": Config.MEDIA_REQUESTS_API_KEY,
+    "Content-Type": "application/json",
+}
+
+PAGE_SIZE = 100
+
+
+def title_key(title: str) -> str:
+    """Normalize a title for matching: case, punctuation and a leading "the" are ignored."""
+    key = re.sub(r"[^\w\s]", "", title.casefold())
+    key = re.sub(r"^the\s+", "", key.strip())
+    return re.sub(r"\s+", " ", key)
+
+
+async def _get(endpoint: str, params: dict | None = None) -> dict | list:
+    url = f"{Config.MEDIA_REQUESTS_URL}/api/v1{endpoint}"
+    return await get_json("media_requests", url, headers=HEADERS, params=params)
+
+
+class RequestMirror:
+    def __init__(self):
+        self.synced_at: float | None = None
+        self._requests: dict[int, dict] = {}
+        self._by_title: dict[str, set[int]] = defaultdict(set)
+        self._by_tmdb: dict[int, set[int]] = defaultdict(set)
+        self._by_requester: dict[str, set[int]] = defaultdict(set)
+        self._by_status: dict[tuple[str, int], set[int]] = defaultdict(set)
+        self._titles: dict[tuple[str, int], str] = {}
+        self._cursor = ""  # newest updatedAt seen
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    # ── Freshness ───────────────────────────────────────────────────
+
+    def age(self) -> float | None:
+        """Seconds since the last successful sync, or None before the first one."""
+        return None if self.synced_at is None else time.time() - self.synced_at
+
+    @property
+    def ready(self) -> bool:
+        """Synced recently enough to answer from; otherwise callers go to the service."""
+        age = self.age()
+        return age is not None and age < Config.REQUEST_MIRROR_MAX_AGE_SECONDS
+
+    # ── Lookups ─────────────────────────────────────────────────────
+
+    def _newest_first(self, ids) -> list[dict]:
+        return sorted(
+            (self._requests[i] for i in ids), key=lambda r: r.get("createdAt", ""), reverse=True
+        )
+
+    def find_title(self, title: str) -> list[dict]:
+        """Requests for exactly this (normalized) title.
+
+        No partial matches: "Up" must not answer with the status of "Upgrade".
+        Callers search the service for anything not found here.
+        """
+        return self._newest_first(self._by_title.get(title_key(title), ()))
+
+    def find_tmdb(self, tmdb_id: int) -> list[dict]:
+        return self._newest_first(self._by_tmdb.get(tmdb_id, ()))
+
+    def select(
+        self,
+        kind: str | None = None,
+        codes: set[int] | None = None,
+        requester: str | None = None,
+    ) -> list[dict]:
+        """Requests matching a status filter and/or requester, newest first.
+
+        kind is "request" or "media" (which status field `codes` refers to).
+        """
+        ids = set(self._requests)
+        if kind is not None:
+            ids &= set().union(*(self._by_status.get((kind, c), ()) for c in codes or ()))
+        if requester:
+            ids &= self._by_requester.get(requester.casefold(), set())
+        return self._newest_first(ids)
+
+    def titles(self, containing: str = "", limit: int = 25) -> list[str]:
+        """Distinct titles for autocomplete, newest request first."""
+        key = title_key(containing)
+        seen = {}
+        for req in self._newest_first(self._requests):
+            if key in title_key(req["title"]):
+                seen.setdefault(req["title"], None)
+                if len(seen) >= limit:
+                    break
+        return list(seen)
+
+    # ── Updates ─────────────────────────────────────────────────────
+
+    def _keys(self, req: dict) -> list[tuple[dict, object]]:
+        """(index, key) pairs under which a request is filed."""
+        media = req.get("media") or {}
+        return [
+            (self._by_title, title_key(req["title"])),
+            (self._by_tmdb, media.get("tmdbId")),
+            (self._by_requester, (req.get("requestedBy") or {}).get("displayName", "").casefold()),
+            (self._by_status, ("request", req.get("status"))),
+            (self._by_status, ("media", media.get("status"))),
+        ]
+
+    def upsert(self, req: dict) -> None:
+        """Add or replace one request (which must already have a "title")."""
+        self.remove(req["id"])
+        self._requests[req["id"]] = req
+        for index, key in self._keys(req):
+            index[key].add(req["id"])
+        self._cursor = max(self._cursor, req.get("updatedAt") or "")
+
+    def remove(self, request_id: int) -> None:
+        old = self._requests.pop(request_id, None)
+        if old is None:
+            return
+        for index, key in self._keys(old):
+            index[key].discard(request_id)
+            if not index[key]:
+                del index[key]
+
+    # ── Sync ────────────────────────────────────────────────────────
+
+    async def _title(self, media_type: str, media: dict) -> str:
+        if media.get("title") or media.get("name"):
+            return media.get("title") or media.get("name")
+        tmdb_id = media.get("tmdbId")
+        if tmdb_id is None:
+            return "Unknown"
+        key = (media_type, tmdb_id)
+        if key not in self._titles:
+            try:
+                details = await _get(f"/{'tv' if media_type == 'tv' else 'movie'}/{tmdb_id}")
+                self._titles[key] = details.get("title") or details.get("name") or f"ID:{tmdb_id}"
+            except Exception:
+                return f"ID:{tmdb_id}"  # retried on the next sync that sees it
+        return self._titles[key]
+
+    async def with_title(self, req: dict) -> dict:
+        """Return req with a resolved "title" field."""
+        return {**req, "title": await self._title(req.get("type", "movie"), req.get("media") or {})}
+
+    async def sync(self, full: bool = False) -> int:
+        """Fetch requests changed since the last sync (all of them if `full`).
+
+        Returns the number of requests fetched.
+        """
+        async with self._lock:
+            cursor = "" if full or self.synced_at is None else self._cursor
+            changed = []
+            skip = 0
+            while True:
+                data = await _get(
+                    "/request", params={"take": PAGE_SIZE, "skip": skip, "sort": "modified"}
+                )
+                page = data.get("results", [])
+                fresh = [r for r in page if (r.get("updatedAt") or "") >= cursor]
+                changed.extend(fresh)
+                if len(fresh) < len(page) or len(page) < PAGE_SIZE:
+                    break
+                skip += PAGE_SIZE
+
+            semaphore = asyncio.Semaphore(4)
+
+            async def resolve(req: dict) -> dict:
+                async with semaphore:
+                    return await self.with_title(req)
+
+            changed = await asyncio.gather(*(resolve(r) for r in changed))
+            if cursor == "":
+                for request_id in list(self._requests):
+                    self.remove(request_id)
+            for req in changed:
+                self.upsert(req)
+            self.synced_at = time.time()
+            return len(changed)
+
+    async def run(self) -> None:
+        """Keep the mirror in sync forever."""
+        last_full = 0.0
+        while True:
+            full = time.monotonic() - last_full >= Config.REQUEST_MIRROR_FULL_SYNC_SECONDS
+            try:
+                count = await self.sync(full=full)
+                if full:
+                    last_full = time.monotonic()
+                    log.info(f"🔄 Request mirror: full sync, {len(self._requests)} requests")
+                elif count:
+                    log.debug(f"Request mirror: {count} changed")
+            except Exception as e:
+                log.warning(f"Request mirror sync failed: {e}")
+            await asyncio.sleep(Config.REQUEST_MIRROR_INTERVAL_SECONDS)
+
+    def start(self) -> None:
+        """Start the background sync task (once) on the running loop."""
+        if Config.REQUEST_MIRROR and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self.run())
+
+
+request_mirror = RequestMirror()
@@ -0,0 +1,79 @@
+"""Structured tool results.
+
+Tools return a ToolResult: plain records plus presentation hints. Claude gets
+the compact encoding (key=value pairs for a single record, otherwise a header
+row and one pipe-separated line per record, with field projection and a row
+cap); Discord gets the markdown rendering. An optional note (e.g. how fresh
+the data is) is appended to both.
+"""
+
+from typing import Callable
+
+
+class ToolResult:
+    def __init__(
+        self,
+        name: str,
+        records: list[dict],
+        render_row: Callable[[dict], str],
+        title: str | None = None,
+        empty: str = "No results.",
+        fields: list[str] | None = None,
+        note: str | None = None,
+    ):
+        """
+        Args:
+            name: Short identifier used as the compact header, e.g. "movie_queue".
+            records: One dict per row, with plain (emoji-free) values.
+            render_row: Formats one record as a Discord markdown line.
+            title: Markdown heading for render(); omitted if None.
+            empty: Message used by both encodings when there are no records.
+            fields: Fields sent to the model by default; all fields if None.
+            note: One-line footnote for both encodings, e.g. "synced 40s ago".
+        """
+        self.name = name
+        self.records = records
+        self.render_row = render_row
+        self.title = title
+        self.empty = empty
+        self.fields = fields
+        self.note = note
+
+    def compact(self, fields: list[str] | None = None, max_rows: int | None = None) -> str:
+        """Token-lean encoding for the model: key=value for one record, else a table."""
+        if not self.records:
+            return self.empty
+        fields = fields or self.fields or list(self.records[0])
+        if len(self.records) == 1:
+            record = self.records[0]
+            line = f"{self.name}: " + " ".join(f"{f}={_cell(record.get(f))}" for f in fields)
+            return f"{line} ({self.note})" if self.note else line
+        rows = self.records[:max_rows] if max_rows else self.records
+        lines = [f"{self.name} ({len(self.records)} rows)", "|".join(fields)]
+        lines.extend("|".join(_cell(r.get(f)) for f in fields) for r in rows)
+        if len(rows) < len(self.records):
+            lines.append(f"... {len(self.records) - len(rows)} more")
+        if self.note:
+            lines.append(f"({self.note})")
+        return "\n".join(lines)
+
+    def render(self) -> str:
+        """Discord markdown, as shown to users."""
+        if not self.records:
+            return self.empty
+        lines = [self.title] if self.title else []
+        lines.extend(self.render_row(r) for r in self.records)
+        if self.note:
+            lines.append(f"-# {self.note}")
+        return "\n".join(lines)
+
+    def __str__(self) -> str:
+        return self.render()
+
+
+def _cell(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "y" if value else "n"
+    return str(value).replace("|", "/").replace("\n", " ")
@@ -1,7 +1,8 @@
 """TV show service API wrapper for Apollo Bot tool calls."""
 
-import aiohttp
 from config import Config
+from tools.http import get_json
+from tools.results import ToolResult
 
 HEADERS = {
     "X-Api-Key": Config.TV_SERVICE_API_KEY,
@@ -11,73 +12,86 @@ HEADERS = {
 
 async def _get(endpoint: str, params: dict | None = None) -> dict | list:
     url = f"{Config.TV_SERVICE_URL}/api/v3{endpoint}"
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers=HEADERS, params=params) as resp:
-            resp.raise_for_status()
-            return await resp.json()
+    return await get_json("shows", url, headers=HEADERS, params=params)
 
 
-async def get_queue() -> str:
+async def get_queue() -> ToolResult:
     """Get the current TV Show download queue."""
     data = await _get("/queue", params={"pageSize": 10, "sortKey": "progress", "sortDirection": "ascending"})
     records = data.get("records", [])
 
-    if not records:
-        return "The TV Show download queue is empty — no episodes are currently downloading."
-
-    lines = []
+    rows = []
     for item in records:
-        title = item.get("title", "Unknown")
-        series = item.get("series", {}).get("title", "")
         episode = item.get("episode", {})
-        ep_info = f"S{episode.get('seasonNumber', '?'):02d}E{episode.get('episodeNumber', '?'):02d}"
-        status = item.get("status", "unknown")
         size = item.get("size", 1)
         sizeleft = item.get("sizeleft", 0)
-        pct = round((1 - sizeleft / size) * 100, 1) if size > 0 else 0
-        time_left = item.get("timeleft", "unknown")
-        lines.append(f"• **{series}** {ep_info} — {status} | {pct}% done | ETA: {time_left}")
-
-    return "**TV Show Download Queue:**\n" + "\n".join(lines)
+        rows.append({
+            "series": item.get("series", {}).get("title", ""),
+            "episode": f"S{episode.get('seasonNumber', '?'):02d}E{episode.get('episodeNumber', '?'):02d}",
+            "status": item.get("status", "unknown"),
+            "pct": round((1 - sizeleft / size) * 100, 1) if size > 0 else 0,
+            "eta": item.get("timeleft", "unknown"),
+        })
+
+    return ToolResult(
+        "tv_queue",
+        rows,
+        lambda r: f"• **{r['series']}** {r['episode']} — {r['status']} | {r['pct']}% done | ETA: {r['eta']}",
+        title="**TV Show Download Queue:**",
+        empty="The TV Show download queue is empty — no episodes are currently downloading.",
+    )
 
 
-async def lookup_series(title: str) -> str:
+async def lookup_series(title: str) -> ToolResult:
     """Look up a TV series in TV Show's library."""
     results = await _get("/series/lookup", params={"term": title})
 
-    if not results:
-        return f"No series found matching '{title}' in TV Show."
-
-    lines = []
-    for series in results[:3]:
-        name = series.get("title", "Unknown")
-        year = series.get("year", "?")
-        monitored = series.get("monitored", False)
+    rows = []
+    for series in (results or [])[:3]:
         stats = series.get("statistics", {})
         ep_count = stats.get("episodeFileCount", 0)
-        total = stats.get("totalEpisodeCount", 0)
-
         if ep_count > 0:
-            status = f"✅ {ep_count}/{total} episodes downloaded"
-        elif monitored:
-            status = "⏳ Monitored (waiting for episodes)"
+            status = "downloaded"
+        elif series.get("monitored", False):
+            status = "monitored"
         else:
-            status = "Not in library"
+            status = "not in library"
+        rows.append({
+            "title": series.get("title", "Unknown"),
+            "year": series.get("year", "?"),
+            "status": status,
+            "episodes": ep_count,
+            "total": stats.get("totalEpisodeCount", 0),
+        })
+
+    return ToolResult(
+        "series_lookup",
+        rows,
+        _render_lookup,
+        title="**TV Show Lookup:**",
+        empty=f"No series found matching '{title}' in TV Show.",
+    )
 
-        lines.append(f"• **{name}** ({year}) — {status}")
 
-    return "**TV Show Lookup:**\n" + "\n".join(lines)
+def _render_lookup(r: dict) -> str:
+    if r["status"] == "downloaded":
+        status = f"✅ {r['episodes']}/{r['total']} episodes downloaded"
+    elif r["status"] == "monitored":
+        status = "⏳ Monitored (waiting for episodes)"
+    else:
+        status = "Not in library"
+    return f"• **{r['title']}** ({r['year']}) — {status}"
 
 
-async def get_system_status() -> str:
+async def get_system_status() -> ToolResult:
     """Get TV Show system health status."""
     status = await _get("/system/status")
     health = await _get("/health")
 
-    version = status.get("version", "?")
     issues = [h.get("message", "") for h in health] if health else ["No issues"]
 
-    return (
-        f"**TV Show Status:** v{version}\n"
-        f"**Health:** {'; '.join(issues)}"
+    return ToolResult(
+        "tv_system",
+        [{"version": status.get("version", "?"), "health": "; ".join(issues)}],
+        lambda r: f"**TV Show Status:** v{r['version']}\n**Health:** {r['health']}",
     )
@@ -0,0 +1,212 @@
+"""Vector store backends used by the RAG pipeline.
+
+Both backends store pre-computed, L2-normalized embeddings and return results
+in the same shape, so rag.py can switch between them via VECTOR_BACKEND:
+
+- ChromaStore: persistent ChromaDB collection (SQLite + HNSW index).
+- NumpyStore: one embedding matrix on disk, memory-mapped and searched exactly
+  with a single matrix-vector product. Fast and simple for corpora up to a few
+  thousand chunks.
+"""
+
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+
+class VectorStore:
+    """Interface shared by all backends."""
+
+    def count(self) -> int:
+        raise NotImplementedError
+
+    def upsert(
+        self,
+        ids: list[str],
+        documents: list[str],
+        metadatas: list[dict],
+        embeddings: list[list[float]],
+    ) -> None:
+        raise NotImplementedError
+
+    def query(self, embedding: list[float], n_results: int) -> list[dict]:
+        """Return up to n_results dicts with 'text', 'source', 'section', 'chunk',
+        'distance' and 'embedding'.
+
+        Distance is cosine distance (1 - cosine similarity), smallest first.
+        'chunk' is the chunk's position within its source file, if recorded.
+        """
+        raise NotImplementedError
+
+    def persist(self) -> None:
+        """Flush pending writes. A no-op for backends that write through."""
+
+
+# ── ChromaDB ────────────────────────────────────────────────────────
+
+
+class ChromaStore(VectorStore):
+    def __init__(self, collection):
+        self.collection = collection
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def upsert(self, ids, documents, metadatas, embeddings) -> None:
+        self.collection.upsert(
+            ids=ids, documents=documents, metadatas=metadatas, embeddings=embeddings
+        )
+
+    def query(self, embedding, n_results) -> list[dict]:
+        results = self.collection.query(
+            query_embeddings=[embedding],
+            n_results=n_results,
+            include=["documents", "metadatas", "distances", "embeddings"],
+        )
+        retrieved = []
+        for i in range(len(results["ids"][0])):
+            metadata = results["metadatas"][0][i] or {}
+            retrieved.append({
+                "text": results["documents"][0][i],
+                "source": metadata.get("source", "unknown"),
+                "section": metadata.get("section", ""),
+                "chunk": metadata.get("chunk"),
+                "distance": results["distances"][0][i] if results["distances"] else None,
+                "embedding": results["embeddings"][0][i],
+            })
+        return retrieved
+
+
+# ── NumPy ───────────────────────────────────────────────────────────
+
+
+class NumpyStore(VectorStore):
+    """Exact top-k search over a memory-mapped embedding matrix.
+
+    Files under `path`:
+        records.json    ids, documents, metadatas and the matrix dtype
+        embeddings.npy  (n, dim) matrix in float32, float16 or int8
+        scales.npy      per-row dequantization scales (int8 only)
+    """
+
+    DTYPES = ("float32", "float16", "int8")
+
+    def __init__(self, path: str, dtype: str = "float32"):
+        if dtype not in self.DTYPES:
+            raise ValueError(f"Unsupported NumPy store dtype: {dtype}")
+        self.path = Path(path)
+        self.dtype = dtype
+        self._ids: list[str] = []
+        self._documents: list[str] = []
+        self._metadatas: list[dict] = []
+        self._matrix: np.ndarray | None = None
+        self._scales: np.ndarray | None = None
+        self._staged: dict[str, tuple[str, dict, np.ndarray]] = {}
+        self._load()
+
+    def _load(self) -> None:
+        records_file = self.path / "records.json"
+        if not records_file.exists():
+            return
+        records = json.loads(records_file.read_text(encoding="utf-8"))
+        self._ids = records["ids"]
+        self._documents = records["documents"]
+        self._metadatas = records["metadatas"]
+        self._matrix = np.load(self.path / "embeddings.npy", mmap_mode="r")
+        if records["dtype"] == "int8":
+            self._scales = np.load(self.path / "scales.npy")
+        else:
+            self._scales = None
+
+    def count(self) -> int:
+        return len(self._ids)
+
+    def upsert(self, ids, documents, metadatas, embeddings) -> None:
+        for chunk_id, doc, meta, emb in zip(ids, documents, metadatas, embeddings):
+            self._staged[chunk_id] = (doc, meta, normalize(np.asarray(emb, dtype=np.float32)))
+
+    def persist(self) -> None:
+        if not self._staged:
+            return
+
+        rows: dict[str, tuple[str, dict, np.ndarray]] = {}
+        if self._matrix is not None:
+            existing = self._dequantized()
+            for i, chunk_id in enumerate(self._ids):
+                rows[chunk_id] = (self._documents[i], self._metadatas[i], existing[i])
+        rows.update(self._staged)
+        self._staged = {}
+
+        ids = list(rows)
+        matrix = np.stack([rows[i][2] for i in ids]).astype(np.float32)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        if self.dtype == "int8":
+            scales = np.abs(matrix).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            stored = np.round(matrix / scales[:, None]).astype(np.int8)
+            _atomic_save(self.path / "scales.npy", scales.astype(np.float32))
+        else:
+            stored = matrix.astype(self.dtype)
+        _atomic_save(self.path / "embeddings.npy", stored)
+
+        records = {
+            "dtype": self.dtype,
+            "ids": ids,
+            "documents": [rows[i][0] for i in ids],
+            "metadatas": [rows[i][1] for i in ids],
+        }
+        tmp = self.path / "records.json.tmp"
+        tmp.write_text(json.dumps(records), encoding="utf-8")
+        os.replace(tmp, self.path / "records.json")
+        self._load()
+
+    def query(self, embedding, n_results) -> list[dict]:
+        if self._matrix is None or not self._ids or n_results <= 0:
+            return []
+
+        q = normalize(np.asarray(embedding, dtype=np.float32))
+        scores = self._matrix @ q
+        if self._scales is not None:
+            scores = scores * self._scales
+
+        k = min(n_results, len(self._ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        return [
+            {
+                "text": self._documents[i],
+                "source": self._metadatas[i].get("source", "unknown"),
+                "section": self._metadatas[i].get("section", ""),
+                "chunk": self._metadatas[i].get("chunk"),
+                "distance": float(1.0 - scores[i]),
+                "embedding": self._row(i),
+            }
+            for i in top
+        ]
+
+    def _row(self, i: int) -> np.ndarray:
+        row = np.asarray(self._matrix[i], dtype=np.float32)
+        if self._scales is not None:
+            row = row * self._scales[i]
+        return row
+
+    def _dequantized(self) -> np.ndarray:
+        matrix = np.asarray(self._matrix, dtype=np.float32)
+        if self._scales is not None:
+            matrix = matrix * self._scales[:, None]
+        return matrix
+
+
+def normalize(vec: np.ndarray) -> np.ndarray:
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm > 0 else vec
+
+
+def _atomic_save(path: Path, array: np.ndarray) -> None:
+    tmp = path.with_suffix(".tmp.npy")
+    np.save(tmp, array)
+    os.replace(tmp, path)
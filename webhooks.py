@@ -0,0 +1,104 @@
+"""Webhook receiver: services push changes so cached status is never stale.
+
+Point each service's webhook at http://<bot host>:WEBHOOK_PORT/webhooks/<service>?token=WEBHOOK_SECRET,
+where <service> is one of:
+
+- requests  (Overseerr/Jellyseerr: "Webhook" notification agent)
+- movies    (Radarr: Settings → Connect → Webhook)
+- shows     (Sonarr: Settings → Connect → Webhook)
+- activity  (Tautulli: Notification Agents → Webhook, JSON body)
+
+Every event drops the slash-command cache entries it could affect; request
+events also trigger an immediate request mirror sync. The payload is only
+logged, so any event type is safe to send.
+"""
+
+import asyncio
+import hmac
+import logging
+
+from aiohttp import web
+
+from config import Config
+from tools import activity, media_requests, movies, shows
+from tools.cache import tool_cache
+from tools.request_mirror import request_mirror
+
+log = logging.getLogger("apollo-bot.webhooks")
+
+# Tool results each service's events can change.
+INVALIDATES = {
+    "requests": [media_requests.get_request_by_title, media_requests.get_requests, media_requests.search_media],
+    "movies": [movies.get_queue, movies.lookup_movie],
+    "shows": [shows.get_queue, shows.lookup_series],
+    "activity": [activity.get_activity, activity.get_recently_added],
+}
+
+_sync_task: asyncio.Task | None = None
+_sync_again = False
+
+
+async def _sync_mirror() -> None:
+    """Sync the request mirror, once more if events arrived while syncing."""
+    global _sync_again
+    while True:
+        _sync_again = False
+        try:
+            count = await request_mirror.sync()
+            log.debug(f"Request mirror: {count} changed after webhook")
+        except Exception as e:
+            log.warning(f"Request mirror sync after webhook failed: {e}")
+        if not _sync_again:
+            return
+
+
+def _event_name(payload: dict) -> str:
+    # Overseerr, Radarr/Sonarr and Tautulli (as usually configured) respectively.
+    return str(
+        payload.get("notification_type") or payload.get("eventType") or payload.get("action") or "event"
+    )
+
+
+async def handle(request: web.Request) -> web.Response:
+    global _sync_task, _sync_again
+    service = request.match_info["service"]
+    if service not in INVALIDATES:
+        raise web.HTTPNotFound()
+    token = request.query.get("token", "")
+    if not Config.WEBHOOK_SECRET or not hmac.compare_digest(token, Config.WEBHOOK_SECRET):
+        raise web.HTTPUnauthorized()
+
+    try:
+        payload = await request.json()
+    except ValueError:
+        payload = {}
+    if not isinstance(payload, dict):
+        payload = {}
+
+    dropped = tool_cache.invalidate(*INVALIDATES[service])
+    if service == "requests" and Config.REQUEST_MIRROR:
+        # Answer the webhook now; the sync runs in the background.
+        if _sync_task is None or _sync_task.done():
+            _sync_task = asyncio.create_task(_sync_mirror())
+        else:
+            _sync_again = True
+    log.info(f"🪝 {service}: {_event_name(payload)} (dropped {dropped} cached results)")
+    return web.Response(status=204)
+
+
+async def start() -> web.AppRunner | None:
+    """Serve the webhook endpoints on WEBHOOK_PORT.
+
+    Returns None without listening if WEBHOOK_SECRET is unset: anyone who can
+    reach the port could otherwise flush caches and trigger syncs.
+    """
+    if not Config.WEBHOOK_SECRET:
+        log.error("❌ WEBHOOK_PORT is set but WEBHOOK_SECRET is empty; not starting the webhook receiver")
+        return None
+    app = web.Application()
+    app.router.add_post("/webhooks/{service}", handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, Config.WEBHOOK_HOST, Config.WEBHOOK_PORT).start()
+    log.info(f"🪝 Listening for webhooks on {Config.WEBHOOK_HOST}:{Config.WEBHOOK_PORT}")
+    return runner
@@ -0,0 +1,127 @@
+"""Apollo Bot — LLM worker process for DEPLOY_MODE=gateway.
+
+Claims queued turns from the broker, runs retrieval + Claude + tools, and
+writes replies back for the gateway (bot.py) to send. Run as many of these
+as you have cores:
+
+    python worker.py                # WORKER_CONCURRENCY turns at a time
+    python worker.py --id worker-2  # explicit worker name for logs
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import socket
+
+import guilds
+from broker import SQLiteBroker
+from config import Config
+from deadline import Deadline
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+)
+log = logging.getLogger("apollo-worker")
+
+# A job claimed longer ago than this is assumed to belong to a dead worker.
+STALE_JOB_SECONDS = 300
+
+
+async def handle_job(broker: SQLiteBroker, job: dict) -> None:
+    from llm import chat
+
+    channel_id = job["channel_id"]
+    guild = guilds.for_guild(job["guild_id"]) or guilds.DEFAULT
+    try:
+        history = await asyncio.to_thread(broker.get_history, channel_id)
+        response_text = await chat(
+            user_message=job["content"],
+            conversation_history=history if history else None,
+            # Time spent waiting in the queue counts against the budget.
+            deadline=Deadline(Config.RESPONSE_DEADLINE_SECONDS, started=job["created_at"]),
+            collection=guild.collection,
+        )
+        delivered = await asyncio.to_thread(
+            broker.complete,
+            job["id"],
+            response_text,
+            False,
+            [
+                {"role": "user", "content": job["content"]},
+                {"role": "assistant", "content": response_text},
+            ],
+            Config.MAX_CONVERSATION_HISTORY * 2,
+        )
+        if not delivered:
+            # The gateway gave up waiting; nobody saw this answer, so it stays out of the history.
+            log.info(f"Job {job['id']} was abandoned before it finished; reply dropped")
+    except Exception as e:
+        log.error(f"Error processing job {job['id']}: {e}", exc_info=True)
+        await asyncio.to_thread(
+            broker.complete,
+            job["id"],
+            "Sorry, I ran into an error processing your request. Please try again in a moment.",
+            True,
+        )
+
+
+async def run_slot(broker: SQLiteBroker, name: str) -> None:
+    """Claim and process jobs one at a time, forever."""
+    while True:
+        job = await asyncio.to_thread(broker.claim, name)
+        if job is None:
+            await asyncio.sleep(Config.WORKER_POLL_SECONDS)
+            continue
+        log.info(f"{name}: job {job['id']} (channel {job['channel_id']})")
+        await handle_job(broker, job)
+
+
+async def housekeeping(broker: SQLiteBroker) -> None:
+    import rag
+
+    while True:
+        requeued = await asyncio.to_thread(broker.requeue_stale, STALE_JOB_SECONDS)
+        if requeued:
+            log.warning(f"Re-queued {requeued} stale job(s)")
+        await asyncio.to_thread(broker.purge, 3600)
+        if guilds.MULTI_GUILD:
+            try:
+                evicted = await asyncio.to_thread(rag.evict_idle_stores, Config.GUILD_INDEX_IDLE_SECONDS)
+            except Exception as e:
+                log.error(f"Closing idle doc indexes failed: {e}", exc_info=True)
+                evicted = []
+            for name in evicted:
+                log.info(f"💤 Closed idle doc index {name}")
+        await asyncio.sleep(60)
+
+
+async def run(worker_id: str) -> None:
+    import rag
+    from tools.request_mirror import request_mirror
+
+    broker = SQLiteBroker()
+    log.info(f"🔥 {worker_id}: warming up...")
+    await asyncio.to_thread(rag.warm_up, not guilds.MULTI_GUILD)
+    request_mirror.start()
+    log.info(f"🚀 {worker_id}: processing up to {Config.WORKER_CONCURRENCY} turns at a time")
+    await asyncio.gather(
+        housekeeping(broker),
+        *(run_slot(broker, f"{worker_id}/{i}") for i in range(Config.WORKER_CONCURRENCY)),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--id", default=f"{socket.gethostname()}-{os.getpid()}")
+    args = parser.parse_args()
+
+    if not Config.ANTHROPIC_API_KEY:
+        log.error("❌ ANTHROPIC_API_KEY is not set. Check your .env file.")
+        return
+    asyncio.run(run(args.id))
+
+
+if __name__ == "__main__":
+    main()